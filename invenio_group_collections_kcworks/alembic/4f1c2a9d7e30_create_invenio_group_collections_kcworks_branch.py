@@ -0,0 +1,25 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Create invenio-group-collections-kcworks branch."""
+
+# revision identifiers, used by Alembic.
+revision = "4f1c2a9d7e30"
+down_revision = None
+branch_labels = ("invenio_group_collections_kcworks",)
+depends_on = "dbdbc1b19cf2"
+
+
+def upgrade():
+    """Upgrade database."""
+    pass
+
+
+def downgrade():
+    """Downgrade database."""
+    pass
@@ -0,0 +1,42 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Add an index for looking up group roles by remote group."""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b3e61d05a74"
+down_revision = "4f1c2a9d7e30"
+branch_labels = ()
+depends_on = "9848d0149abd"
+
+
+def upgrade():
+    """Upgrade database.
+
+    Group roles are found with an anchored ``LIKE 'prefix|%'`` match on
+    the role name, which PostgreSQL can only serve from an index built
+    with ``varchar_pattern_ops`` (unless the database uses the C locale).
+    Their memberships are always looked up within one community, which
+    the ``(community_id, group_id)`` index of ``communities_members``
+    already covers.
+    """
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_accounts_role_name_pattern "
+        "ON accounts_role (name varchar_pattern_ops)"
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_accounts_role_name_pattern")
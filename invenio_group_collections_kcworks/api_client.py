@@ -0,0 +1,217 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Pooled HTTP client for requests to Commons instance APIs."""
+
+import json
+import threading
+from copy import deepcopy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CachedResponse:
+    """Minimal stand-in for a ``requests.Response`` served from cache."""
+
+    status_code = 200
+    from_cache = True
+
+    def __init__(self, payload: dict, headers: dict | None = None):
+        """Constructor."""
+        self._payload = payload
+        self.headers = headers or {}
+
+    def json(self) -> dict:
+        """Return a copy of the cached payload."""
+        return deepcopy(self._payload)
+
+    @property
+    def text(self) -> str:
+        """Return the cached payload serialized as JSON."""
+        return json.dumps(self._payload)
+
+
+class CommonsAPIClient:
+    """Shared, keep-alive HTTP sessions for outbound Commons API calls.
+
+    One ``requests.Session`` is kept per Commons instance (plus a default
+    session for urls that do not belong to a configured instance, such
+    as avatar images on a media server). Each session mounts an adapter
+    with a bounded connection pool so that repeated calls reuse open
+    TCP/TLS connections.
+
+    Pool sizes and timeouts are read from the
+    ``GROUP_COLLECTIONS_METADATA_ENDPOINTS`` entry for the instance, with
+    ``GROUP_COLLECTIONS_HTTP_POOL_SIZE`` and ``GROUP_COLLECTIONS_HTTP_TIMEOUT``
+    as fallbacks.
+    """
+
+    def __init__(self, app, metadata_cache=None):
+        """Constructor."""
+        self.app = app
+        self.metadata_cache = metadata_cache
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint_config(self, commons_instance: str | None) -> dict:
+        endpoints = self.app.config.get("GROUP_COLLECTIONS_METADATA_ENDPOINTS", {})
+        return endpoints.get(commons_instance, {}) if commons_instance else {}
+
+    def timeout_for(self, commons_instance: str | None = None) -> float | tuple:
+        """Return the request timeout configured for a Commons instance."""
+        return self._endpoint_config(commons_instance).get(
+            "timeout", self.app.config.get("GROUP_COLLECTIONS_HTTP_TIMEOUT", 15)
+        )
+
+    def _make_session(self, commons_instance: str | None) -> requests.Session:
+        pool_size = self._endpoint_config(commons_instance).get(
+            "pool_size", self.app.config.get("GROUP_COLLECTIONS_HTTP_POOL_SIZE", 10)
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session_for(self, commons_instance: str | None = None) -> requests.Session:
+        """Return the pooled session for a Commons instance.
+
+        Sessions are created lazily on first use and then kept for the life
+        of the process.
+
+        params:
+            commons_instance: The name of the Commons instance. If omitted,
+                the default session is returned.
+        """
+        key = commons_instance or ""
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._make_session(commons_instance)
+                    self._sessions[key] = session
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        commons_instance: str | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Send a request through the pooled session for an instance.
+
+        If no ``timeout`` keyword argument is given, the timeout configured
+        for the instance is used.
+        """
+        kwargs.setdefault("timeout", self.timeout_for(commons_instance))
+        return self.session_for(commons_instance).request(method, url, **kwargs)
+
+    def get(
+        self, url: str, commons_instance: str | None = None, **kwargs
+    ) -> requests.Response:
+        """Send a GET request through the pooled session for an instance."""
+        return self.request("GET", url, commons_instance=commons_instance, **kwargs)
+
+    def post(
+        self, url: str, commons_instance: str | None = None, **kwargs
+    ) -> requests.Response:
+        """Send a POST request through the pooled session for an instance."""
+        return self.request("POST", url, commons_instance=commons_instance, **kwargs)
+
+    def get_group_metadata(
+        self,
+        commons_instance: str,
+        group_id: str,
+        url: str,
+        headers: dict | None = None,
+        revalidate: bool = False,
+        **kwargs,
+    ) -> requests.Response | CachedResponse:
+        """Fetch a group's metadata, using the group metadata cache.
+
+        A cached payload younger than the cache TTL is returned without
+        any request. An older one (or any cached payload when
+        ``revalidate`` is True) is revalidated with ``If-None-Match`` and
+        ``If-Modified-Since`` headers, and is only downloaded again if
+        the Commons instance reports that it has changed.
+
+        A payload is only cached if it describes the requested group
+        (i.e. its ``id``, at the top level or under ``results``, matches
+        ``group_id``). Otherwise any cached entry for the group is
+        dropped, so that a group that is not found yet is looked up again
+        once it exists.
+
+        params:
+            commons_instance: The name of the Commons instance.
+            group_id: The ID of the group on the Commons instance.
+            url: The url from which to fetch the group metadata. Payloads
+                from different urls are cached separately.
+            headers: Headers to send with the request.
+            revalidate: If True, never serve a cached payload without
+                checking with the Commons instance first.
+
+        Returns:
+            The response from the Commons instance, or a CachedResponse
+            if the cached payload is still current.
+        """
+        cache = self.metadata_cache
+        entry = cache.get(commons_instance, group_id, url) if cache else None
+        if entry and not revalidate and cache.is_fresh(entry):
+            return CachedResponse(entry["payload"])
+
+        headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.get(
+            url, commons_instance=commons_instance, headers=headers, **kwargs
+        )
+        if cache is None:
+            return response
+        if response.status_code == 304 and entry:
+            cache.touch(commons_instance, group_id, url, entry)
+            return CachedResponse(entry["payload"])
+        if response.status_code == 200:
+            try:
+                payload = response.json()
+            except ValueError:
+                return response
+            if not self._payload_matches(payload, group_id):
+                cache.delete(commons_instance, group_id)
+                return response
+            cache.set(
+                commons_instance,
+                group_id,
+                url,
+                payload,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        elif response.status_code in [404, 410]:
+            cache.delete(commons_instance, group_id)
+        return response
+
+    @staticmethod
+    def _payload_matches(payload, group_id: str) -> bool:
+        """Whether a group metadata payload describes the given group."""
+        content = payload.get("results", payload) if isinstance(payload, dict) else None
+        if not isinstance(content, dict) or content.get("id") is None:
+            return False
+        return str(content["id"]) == str(group_id)
+
+    def close(self) -> None:
+        """Close all pooled sessions."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
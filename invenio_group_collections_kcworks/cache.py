@@ -0,0 +1,594 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Caches used by invenio-group-collections-kcworks."""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from .errors import JobRunningError
+
+
+class GroupMetadataCache:
+    """Cache of Commons group metadata keyed by (instance, group id, url).
+
+    A group's metadata may be fetched from more than one endpoint (e.g. the
+    group collections callback url and the remote user data groups
+    endpoint), which can return different payloads and ETags. So each
+    group holds a separate entry for every url it was fetched from, and
+    deleting a group's entries removes all of them.
+
+    Groups are kept in a size-bounded, in-process LRU. If the app has an
+    ``invenio-cache`` extension (usually Redis) the entries are also written
+    there so that they are shared between worker processes. Local copies
+    are then only trusted for ``GROUP_COLLECTIONS_METADATA_LOCAL_TTL``
+    seconds before they are read again from the shared cache, so that
+    entries deleted or replaced by other processes are soon picked up.
+
+    Each entry stores the decoded payload together with the ``ETag`` and
+    ``Last-Modified`` response headers, so that an entry older than the
+    TTL can be revalidated with a conditional request rather than
+    downloaded again.
+    """
+
+    key_prefix = "group-collections:metadata"
+
+    def __init__(self, app):
+        """Constructor."""
+        self.app = app
+        self._entries: OrderedDict[tuple, tuple[float, dict[str, dict]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        """Seconds for which an entry is served without revalidation."""
+        return self.app.config.get("GROUP_COLLECTIONS_METADATA_CACHE_TTL", 300)
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of groups kept in the in-process LRU."""
+        return self.app.config.get("GROUP_COLLECTIONS_METADATA_CACHE_SIZE", 1000)
+
+    @property
+    def max_age(self) -> int:
+        """Seconds for which an entry is kept for revalidation."""
+        return self.app.config.get("GROUP_COLLECTIONS_METADATA_CACHE_MAX_AGE", 86400)
+
+    @property
+    def local_ttl(self) -> int:
+        """Seconds for which a local copy of a shared entry is trusted."""
+        return self.app.config.get("GROUP_COLLECTIONS_METADATA_LOCAL_TTL", 5)
+
+    @property
+    def shared_cache(self):
+        """The app's shared (Redis) cache, if one is configured."""
+        ext = self.app.extensions.get("invenio-cache")
+        return ext.cache if ext else None
+
+    def _shared_key(self, key: tuple) -> str:
+        return ":".join([self.key_prefix, *key])
+
+    def _group_entries(self, key: tuple) -> dict[str, dict]:
+        shared_cache = self.shared_cache
+        with self._lock:
+            local = self._entries.get(key)
+            if local is not None:
+                stored_at, entries = local
+                # without a shared cache the local copy is the only one
+                if shared_cache is None or time.time() - stored_at < self.local_ttl:
+                    self._entries.move_to_end(key)
+                    return dict(entries)
+                del self._entries[key]
+        if shared_cache is not None:
+            entries = shared_cache.get(self._shared_key(key))
+            if entries is not None:
+                self._store_local(key, entries)
+                return dict(entries)
+        return {}
+
+    def get(self, commons_instance: str, group_id: str, url: str) -> dict | None:
+        """Return the cached entry for a group fetched from a url, or None."""
+        key = (commons_instance, str(group_id))
+        entries = self._group_entries(key)
+        entry = entries.get(url)
+        if entry is not None and time.time() - entry["fetched_at"] > self.max_age:
+            del entries[url]
+            self._save(key, entries)
+            entry = None
+        return entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Whether an entry may be served without revalidation."""
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def _store_local(self, key: tuple, entries: dict[str, dict]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), entries)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _save(self, key: tuple, entries: dict[str, dict]) -> None:
+        if not entries:
+            self._delete(key)
+            return
+        self._store_local(key, entries)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), entries, timeout=self.max_age)
+
+    def set(
+        self,
+        commons_instance: str,
+        group_id: str,
+        url: str,
+        payload: dict,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> dict:
+        """Store a freshly fetched payload for a group and url."""
+        key = (commons_instance, str(group_id))
+        entry = {
+            "payload": payload,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        self._save(key, {**self._group_entries(key), url: entry})
+        return entry
+
+    def touch(
+        self, commons_instance: str, group_id: str, url: str, entry: dict
+    ) -> dict:
+        """Mark an entry as fresh after a successful revalidation."""
+        return self.set(
+            commons_instance,
+            group_id,
+            url,
+            entry["payload"],
+            etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"),
+        )
+
+    def _delete(self, key: tuple) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self._shared_key(key))
+
+    def delete(self, commons_instance: str, group_id: str) -> None:
+        """Remove the entries for a group, whatever url they came from."""
+        self._delete((commons_instance, str(group_id)))
+
+    def clear(self) -> None:
+        """Remove all entries from the in-process LRU."""
+        with self._lock:
+            self._entries.clear()
+
+
+class GroupNotFoundCache:
+    """Short-lived negative cache of Commons groups that could not be found.
+
+    Remembers (instance, group id) pairs for which the Commons API reported
+    no such group, so that repeated requests for a bad id cost at most one
+    remote call per ``GROUP_COLLECTIONS_NOT_FOUND_CACHE_TTL`` window.
+
+    When the app has a shared (Redis) cache the entries live only there,
+    so that an invalidation made by one process is seen by all of them.
+    Otherwise they are kept in process.
+    """
+
+    key_prefix = "group-collections:not-found"
+
+    def __init__(self, app):
+        """Constructor."""
+        self.app = app
+        self._entries: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        """Seconds for which a not-found result is remembered."""
+        return self.app.config.get("GROUP_COLLECTIONS_NOT_FOUND_CACHE_TTL", 60)
+
+    @property
+    def shared_cache(self):
+        """The app's shared (Redis) cache, if one is configured."""
+        ext = self.app.extensions.get("invenio-cache")
+        return ext.cache if ext else None
+
+    def _shared_key(self, key: tuple) -> str:
+        return ":".join([self.key_prefix, *key])
+
+    def __contains__(self, key: tuple) -> bool:
+        """Whether the (instance, group id) pair is known not to exist."""
+        key = (key[0], str(key[1]))
+        if self.ttl <= 0:
+            return False
+        if self.shared_cache is not None:
+            return bool(self.shared_cache.get(self._shared_key(key)))
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is not None and expires <= time.time():
+                del self._entries[key]
+                expires = None
+        return expires is not None
+
+    def add(self, commons_instance: str, group_id: str) -> None:
+        """Remember that a group could not be found."""
+        key = (commons_instance, str(group_id))
+        if self.ttl <= 0:
+            return
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), True, timeout=self.ttl)
+        else:
+            with self._lock:
+                self._entries[key] = time.time() + self.ttl
+
+    def delete(self, commons_instance: str, group_id: str) -> None:
+        """Forget a not-found result, e.g. because the group was created."""
+        key = (commons_instance, str(group_id))
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self._shared_key(key))
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class CollectionOwnerCache:
+    """Process-level cache of the ids used as owners of new collections.
+
+    Holds the id of the administrative user who owns group collections and
+    the id of the ``admin`` role, so that they are looked up once per
+    process rather than on every collection creation. The extension clears
+    the cache whenever a user or role is inserted or deleted in this
+    process, or a user's email or roles or a role's name is changed.
+    Entries also expire after
+    ``GROUP_COLLECTIONS_OWNER_CACHE_TTL`` seconds so that changes made by
+    other processes are eventually picked up.
+    """
+
+    def __init__(self, app):
+        """Constructor."""
+        self.app = app
+        self._value = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        """Seconds for which the cached ids are used."""
+        return self.app.config.get("GROUP_COLLECTIONS_OWNER_CACHE_TTL", 300)
+
+    def get(self, loader) -> tuple:
+        """Return the cached ids, calling ``loader`` to resolve them if needed."""
+        with self._lock:
+            if self._value is None or self._expires <= time.time():
+                self._value = loader()
+                self._expires = time.time() + self.ttl
+            return self._value
+
+    def clear(self) -> None:
+        """Drop the cached ids."""
+        with self._lock:
+            self._value = None
+
+
+class CollectionSlugCache:
+    """In-process LRU cache mapping collection slugs to community ids.
+
+    Only slugs of published (not deleted) communities are cached. The
+    service drops a slug when its collection is deleted or disowned, and
+    callers must check that the community read with a cached id still has
+    the expected slug, since slugs can be changed or re-used by other
+    processes.
+    """
+
+    def __init__(self, app):
+        """Constructor."""
+        self.app = app
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of slugs kept in the cache."""
+        return self.app.config.get("GROUP_COLLECTIONS_SLUG_CACHE_SIZE", 10000)
+
+    def get(self, slug: str) -> str | None:
+        """Return the cached community id for a slug, or None."""
+        with self._lock:
+            community_id = self._entries.get(slug)
+            if community_id is not None:
+                self._entries.move_to_end(slug)
+            return community_id
+
+    def set(self, slug: str, community_id: str) -> None:
+        """Remember the community id for a slug."""
+        with self._lock:
+            self._entries[slug] = str(community_id)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, slug: str) -> None:
+        """Forget the community id for a slug."""
+        with self._lock:
+            self._entries.pop(slug, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class CollectionResponseCache:
+    """Optional shared cache of serialized GET responses.
+
+    Entries are stored only in the app's shared (Redis) cache, and only if
+    ``GROUP_COLLECTIONS_RESPONSE_CACHE_TTL`` is greater than zero. Every
+    key includes a generation token, so that all cached responses can be
+    invalidated at once by replacing the token. The service does this
+    whenever a group collection is created, deleted, disowned or updated
+    from the remote group.
+    """
+
+    key_prefix = "group-collections:response"
+
+    def __init__(self, app):
+        """Constructor."""
+        self.app = app
+
+    @property
+    def ttl(self) -> int:
+        """Seconds for which a response is cached. Zero disables the cache."""
+        return self.app.config.get("GROUP_COLLECTIONS_RESPONSE_CACHE_TTL", 0)
+
+    @property
+    def shared_cache(self):
+        """The app's shared (Redis) cache, if one is configured."""
+        ext = self.app.extensions.get("invenio-cache")
+        return ext.cache if ext else None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether responses are cached."""
+        return self.ttl > 0 and self.shared_cache is not None
+
+    def _generation(self) -> str:
+        generation_key = f"{self.key_prefix}:generation"
+        generation = self.shared_cache.get(generation_key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.shared_cache.set(generation_key, generation, timeout=0)
+        return generation
+
+    def _shared_key(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}:{self._generation()}:{digest}"
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached response entry for a request key, or None."""
+        if not self.enabled:
+            return None
+        return self.shared_cache.get(self._shared_key(key))
+
+    def set(self, key: str, body: str, etag: str) -> None:
+        """Cache a serialized (JSON) response body and its ETag."""
+        if self.enabled:
+            self.shared_cache.set(
+                self._shared_key(key), {"body": body, "etag": etag}, timeout=self.ttl
+            )
+
+    def invalidate(self) -> None:
+        """Invalidate all cached responses."""
+        if self.enabled:
+            self.shared_cache.set(
+                f"{self.key_prefix}:generation", uuid.uuid4().hex, timeout=0
+            )
+
+
+class CollectionJobStore:
+    """Store for the state of background collection jobs.
+
+    Jobs are kept in the app's shared (Redis) cache, so that the API
+    process that submitted a job and the Celery worker that runs it see
+    the same record. Without a shared cache they are kept in process,
+    which only works when Celery tasks run eagerly (e.g. in tests).
+
+    Every write to a job record is made while holding a per-job lock (a
+    key set with the cache's atomic ``add``, i.e. Redis ``SET NX``), so
+    that progress, checkpoint and status updates made from different
+    processes don't overwrite each other. Each write also sets the job's
+    ``updated`` timestamp, which serves as the heartbeat of the worker
+    running it.
+
+    Job records expire ``GROUP_COLLECTIONS_JOB_TTL`` seconds after their
+    last update.
+    """
+
+    key_prefix = "group-collections:job"
+    lock_timeout = 10
+    """Seconds after which a lock left behind by a crashed process expires."""
+
+    def __init__(self, app):
+        """Constructor."""
+        self.app = app
+        self._jobs: dict[str, dict] = {}
+        self._keys: dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ttl(self) -> int:
+        """Seconds for which a job record is kept after its last update."""
+        return self.app.config.get("GROUP_COLLECTIONS_JOB_TTL", 86400)
+
+    @property
+    def lease(self) -> int:
+        """Seconds without an update after which a running job is stale."""
+        return self.app.config.get("GROUP_COLLECTIONS_JOB_LEASE", 600)
+
+    @property
+    def shared_cache(self):
+        """The app's shared (Redis) cache, if one is configured."""
+        ext = self.app.extensions.get("invenio-cache")
+        return ext.cache if ext else None
+
+    @contextmanager
+    def _locked(self, job_id: str):
+        if self.shared_cache is None:
+            with self._lock:
+                yield
+            return
+        lock_key = f"{self.key_prefix}:{job_id}:lock"
+        while not self.shared_cache.add(lock_key, 1, timeout=self.lock_timeout):
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self.shared_cache.delete(lock_key)
+
+    def _save(self, job: dict) -> dict:
+        if self.shared_cache is not None:
+            self.shared_cache.set(
+                f"{self.key_prefix}:{job['id']}", job, timeout=self.ttl
+            )
+        else:
+            with self._lock:
+                self._jobs[job["id"]] = job
+        return job
+
+    def create(self, operation: str, params: dict, key: str | None = None) -> dict:
+        """Create a pending job record for an operation.
+
+        If a ``key`` is given, the job can later be found with
+        ``get_by_key`` (e.g. to resume an earlier job for the same
+        collection rather than starting a new one).
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        job = self._save(
+            {
+                "id": uuid.uuid4().hex,
+                "operation": operation,
+                "params": params,
+                "key": key,
+                "status": "pending",
+                "progress": None,
+                "checkpoint": None,
+                "result": None,
+                "error": None,
+                "created": now,
+                "updated": now,
+            }
+        )
+        if key is not None:
+            if self.shared_cache is not None:
+                self.shared_cache.set(
+                    f"{self.key_prefix}:key:{key}", job["id"], timeout=self.ttl
+                )
+            else:
+                with self._lock:
+                    self._keys[key] = job["id"]
+        return job
+
+    def get_by_key(self, key: str) -> dict | None:
+        """Return the latest job created with the given key, or None."""
+        if self.shared_cache is not None:
+            job_id = self.shared_cache.get(f"{self.key_prefix}:key:{key}")
+        else:
+            with self._lock:
+                job_id = self._keys.get(key)
+        return self.get(job_id) if job_id else None
+
+    def get(self, job_id: str) -> dict | None:
+        """Return the job record with the given id, or None."""
+        if self.shared_cache is not None:
+            return self.shared_cache.get(f"{self.key_prefix}:{job_id}")
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _write(self, job: dict, **fields) -> dict:
+        return self._save(
+            {
+                **job,
+                **fields,
+                "updated": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    def update(self, job_id: str, **fields) -> dict | None:
+        """Update fields of a job record and return the updated record."""
+        with self._locked(job_id):
+            job = self.get(job_id)
+            if job is None:
+                return None
+            return self._write(job, **fields)
+
+    def append_checkpoint(self, job_id: str, items: list) -> dict | None:
+        """Add items to the end of a job's checkpoint.
+
+        The stored checkpoint is extended while the job is locked, so items
+        recorded by overlapping writers are all kept.
+        """
+        with self._locked(job_id):
+            job = self.get(job_id)
+            if job is None:
+                return None
+            return self._write(
+                job, checkpoint=[*(job.get("checkpoint") or []), *items]
+            )
+
+    def is_stale(self, job: dict) -> bool:
+        """Whether an unfinished job has not been updated within the lease."""
+        updated = datetime.fromisoformat(job["updated"])
+        age = (datetime.now(timezone.utc) - updated).total_seconds()
+        return age > self.lease
+
+    def is_resumable(self, job: dict) -> bool:
+        """Whether a job can be run again.
+
+        Failed jobs can always be run again. Pending and running jobs can
+        only be run again once they are stale, since otherwise a worker
+        may still be running (or about to run) them.
+        """
+        if job["status"] == "failed":
+            return True
+        return job["status"] in ("pending", "running") and self.is_stale(job)
+
+    def lease_remaining(self, job: dict) -> float:
+        """Seconds until an unfinished job's lease expires (at least 1)."""
+        updated = datetime.fromisoformat(job["updated"])
+        age = (datetime.now(timezone.utc) - updated).total_seconds()
+        return max(self.lease - age, 1)
+
+    def claim(self, job_id: str) -> dict | None:
+        """Mark a job as running, if no other worker is running it.
+
+        A job is claimed if it is pending, has failed, or is running but
+        stale.
+
+        Raises:
+            JobRunningError: If the job is running and its lease has not
+                expired.
+
+        Returns:
+            The claimed job record, or None if the job does not exist or
+            has already succeeded.
+        """
+        with self._locked(job_id):
+            job = self.get(job_id)
+            if job is None or job["status"] == "succeeded":
+                return None
+            if job["status"] == "running" and not self.is_stale(job):
+                raise JobRunningError(f"Job {job_id} is being run by another worker")
+            return self._write(job, status="running", error=None)
@@ -14,3 +14,165 @@ GROUP_COLLECTIONS_METADATA_ENDPOINTS = {
 }
 
 GROUP_COLLECTIONS_ADMIN_EMAIL = ""
+
+GROUP_COLLECTIONS_HTTP_POOL_SIZE = 10
+"""Default number of pooled keep-alive connections per Commons instance.
+
+May be overridden per instance with a ``pool_size`` key in
+``GROUP_COLLECTIONS_METADATA_ENDPOINTS``.
+"""
+
+GROUP_COLLECTIONS_HTTP_TIMEOUT = 15
+"""Default timeout (seconds) for outbound requests to Commons instances.
+
+May be overridden per instance with a ``timeout`` key in
+``GROUP_COLLECTIONS_METADATA_ENDPOINTS``. Either a number or a
+``(connect, read)`` tuple.
+"""
+
+GROUP_COLLECTIONS_METADATA_CACHE_TTL = 300
+"""Seconds for which cached Commons group metadata is used without
+revalidating it against the Commons instance."""
+
+GROUP_COLLECTIONS_METADATA_CACHE_SIZE = 1000
+"""Maximum number of groups kept in the in-process metadata cache."""
+
+GROUP_COLLECTIONS_METADATA_CACHE_MAX_AGE = 86400
+"""Seconds for which cached group metadata (with its ETag and
+Last-Modified validators) is kept for conditional revalidation."""
+
+GROUP_COLLECTIONS_METADATA_LOCAL_TTL = 5
+"""Seconds for which a worker trusts its in-process copy of group metadata
+held in the shared (Redis) cache before reading it again from there, so
+that entries deleted by other workers are not served for long."""
+
+GROUP_COLLECTIONS_NOT_FOUND_CACHE_TTL = 60
+"""Seconds for which a group that the Commons API reported as not found
+is remembered before it is looked up again. Set to 0 to disable."""
+
+GROUP_COLLECTIONS_OWNER_CACHE_TTL = 300
+"""Seconds for which the owner user and admin role ids assigned to new
+collections are cached in each process."""
+
+GROUP_COLLECTIONS_AVATAR_ASYNC = True
+"""Whether group avatars are downloaded and uploaded in a background task
+after a collection is created. If False the upload happens synchronously
+during the create request."""
+
+GROUP_COLLECTIONS_AVATAR_TASK_MAX_RETRIES = 5
+"""Number of times the background avatar task is retried on timeouts,
+connection errors and server errors."""
+
+GROUP_COLLECTIONS_AVATAR_TASK_BACKOFF = 30
+"""Base delay (seconds) before the first avatar task retry. The delay
+doubles for each subsequent retry."""
+
+GROUP_COLLECTIONS_AVATAR_MAX_SIZE = 5242880
+"""Maximum size (bytes) of a group avatar that will be downloaded and
+used as a collection logo. Larger avatars are ignored."""
+
+GROUP_COLLECTIONS_AVATAR_NORMALIZE = True
+"""Whether group avatars are downscaled and re-encoded before they are
+uploaded as collection logos."""
+
+GROUP_COLLECTIONS_AVATAR_MAX_DIMENSIONS = (400, 400)
+"""Maximum (width, height) of a collection logo made from a group avatar.
+Larger avatars are downscaled, keeping their aspect ratio."""
+
+GROUP_COLLECTIONS_AVATAR_MAX_PIXELS = 25000000
+"""Avatars whose header reports more pixels than this are refused before
+they are decoded."""
+
+GROUP_COLLECTIONS_AVATAR_FORMAT = "WEBP"
+"""Image format for collection logos made from group avatars. Either
+"WEBP" or "PNG" (optimised)."""
+
+GROUP_COLLECTIONS_AVATAR_QUALITY = 85
+"""Encoder quality for lossy logo formats such as WEBP."""
+
+GROUP_COLLECTIONS_SEARCH_FILTER_FIELDS = {
+    "commons_instance": "custom_fields.kcr:commons_instance.keyword",
+    "commons_group_id": "custom_fields.kcr:commons_group_id.keyword",
+}
+"""Indexed fields used to filter collections by Commons instance and group
+id. These must be keyword (not analysed) fields, such as the ``keyword``
+subfield added to a ``TextCF`` custom field by ``use_as_filter=True``."""
+
+GROUP_COLLECTIONS_SEARCH_FALLBACK_FIELDS = {
+    "commons_instance": "custom_fields.kcr:commons_instance",
+    "commons_group_id": "custom_fields.kcr:commons_group_id",
+}
+"""Text fields used (with ``match_phrase`` filters) instead of the
+``GROUP_COLLECTIONS_SEARCH_FILTER_FIELDS`` when those are missing from the
+communities index mapping."""
+
+GROUP_COLLECTIONS_EXPORT_PAGE_SIZE = 500
+"""Number of collections fetched from the search index per request while
+streaming a collection export."""
+
+GROUP_COLLECTIONS_PROJECTION_FIELDS = [
+    "id",
+    "slug",
+    "created",
+    "updated",
+    "revision_id",
+    "access",
+    "metadata",
+    "custom_fields",
+]
+"""Top-level fields of the community index documents that callers may
+request with the ``fields`` parameter of the collection endpoints. Any
+subfield of these (e.g. ``custom_fields.kcr:commons_group_id``) may also
+be requested."""
+
+GROUP_COLLECTIONS_SLUG_CACHE_SIZE = 10000
+"""Maximum number of collection slug to community id mappings cached in
+each process."""
+
+GROUP_COLLECTIONS_BATCH_READ_MAX = 100
+"""Maximum number of collection slugs that can be read with one batch read
+request."""
+
+GROUP_COLLECTIONS_RESPONSE_CACHE_TTL = 0
+"""Seconds for which GET responses from the group collections endpoints are
+kept in the shared (Redis) cache. Zero disables response caching. Cached
+responses are invalidated when a group collection is created, deleted,
+disowned or updated from its Commons group, but not when a collection is
+edited through the communities API, so keep this short."""
+
+GROUP_COLLECTIONS_BULK_CREATE_CONCURRENCY = 8
+"""Number of Commons group metadata requests made at once while creating
+collections in bulk."""
+
+GROUP_COLLECTIONS_BULK_CREATE_MAX = 1000
+"""Maximum number of collections that can be created with one bulk create
+request."""
+
+GROUP_COLLECTIONS_JOB_TTL = 86400
+"""Seconds for which the status and result of a background collection job
+are kept after its last update."""
+
+GROUP_COLLECTIONS_JOB_LEASE = 600
+"""Seconds without an update to its record after which a pending or running
+background collection job is presumed abandoned (e.g. because its worker
+crashed). Running jobs update their record each time they report progress,
+so this should be well above the time taken by one batch of work. Only
+failed or abandoned jobs are run again by ``resume_job``."""
+
+GROUP_COLLECTIONS_MEMBER_CHUNK_SIZE = 100
+"""Maximum number of members added to a collection with one call to the
+community members service when a collection is disowned. Values above the
+members service's own limit of 100 are lowered to it."""
+
+GROUP_COLLECTIONS_INDEX_REFRESH = "records"
+"""How a collection's changes are made visible to search after it is disowned.
+
+One of "none" (rely on the search index's periodic refresh), "wait_for"
+(index the updated collection again with ``refresh=wait_for``, which waits
+for the next periodic refresh instead of forcing one) or "records" (refresh
+only the communities record index). Operations that disown several
+collections at once refresh a single time at the end."""
+
+GROUP_COLLECTIONS_PLAN_SAMPLE_SIZE = 20
+"""Maximum number of sample items listed for each kind of change in a
+disown or group deletion plan."""
@@ -20,6 +20,8 @@ from invenio_access.permissions import system_identity
 from invenio_accounts.models import User, UserIdentity
 from invenio_accounts.proxies import current_accounts
 from invenio_group_collections_kcworks.proxies import (  # noqa
+    current_group_collections,
+    current_group_collections_api_client,
     current_group_collections_service,
 )
 from invenio_queues.proxies import current_queues
@@ -70,6 +72,15 @@ class RemoteGroupDataService(Service):
                     "created",
                     "updated",
                 ]:
+                    if event["event"] == "created":
+                        # the group may previously have been looked up
+                        # and remembered as not found
+                        current_group_collections.not_found_cache.delete(
+                            event["idp"], event["id"]
+                        )
+                        current_group_collections.metadata_cache.delete(
+                            event["idp"], event["id"]
+                        )
                     celery_result = do_group_data_update.delay(  # noqa:F841
                         event["idp"], event["id"]
                     )  # type: ignore
@@ -98,8 +109,13 @@ class RemoteGroupDataService(Service):
 
         if "avatar" in new_data.keys() and new_data["avatar"]:
             try:
+                # the logo is only re-uploaded if the avatar has changed
                 assert current_group_collections_service.update_avatar(
-                    starting_dict["id"], new_data["avatar"]
+                    new_data["avatar"],
+                    starting_dict["id"],
+                    commons_instance=starting_dict["custom_fields"].get(
+                        "kcr:commons_instance"
+                    ),
                 )
             except AssertionError:
                 self.logger.error(
@@ -167,10 +183,14 @@ class RemoteGroupDataService(Service):
         ]
 
         headers = {"Authorization": f"Bearer {remote_api_token}"}
-        response = requests.get(
+        # revalidate the cached payload, since this is usually triggered
+        # by a webhook announcing that the group has changed
+        response = current_group_collections_api_client.get_group_metadata(
+            idp,
+            remote_group_id,
             f"{idp_config['groups']['remote_endpoint']}{remote_group_id}",
             headers=headers,
-            timeout=30,
+            revalidate=True,
         )
         group_metadata = response.json()
 
@@ -186,19 +206,20 @@ class RemoteGroupDataService(Service):
 
         # use slugs from existing group collections if they exist
         # otherwise make new slug(s)
-        if community_list.to_dict()["hits"]["total"] == 0:
+        if community_list.total == 0:
             self.logger.error(
                 f"No group collection found for {idp} group {remote_group_id}"
             )
         else:
+            communities = list(community_list.hits)
             deleted_comms = [
                 community
-                for community in community_list.to_dict()["hits"]["hits"]
+                for community in communities
                 if community["deletion_status"]["is_deleted"] is True
             ]
             active_comms = [
                 community
-                for community in community_list.to_dict()["hits"]["hits"]
+                for community in communities
                 if community["deletion_status"]["is_deleted"] is False
             ]
 
@@ -219,6 +240,7 @@ class RemoteGroupDataService(Service):
                 results_dict.setdefault(community["slug"], {})[
                     "metadata_updated"
                 ] = update_result.to_dict()
+                current_group_collections.response_cache.invalidate()
             elif len(active_comms) == 0:
                 self.logger.info(
                     f"No active group collection found for {idp} "
@@ -234,7 +256,7 @@ class RemoteGroupDataService(Service):
         return results_dict if results_dict else None
 
     def delete_group_from_remote(
-        self, idp: str, remote_group_id: str, remote_group_name
+        self, idp: str, remote_group_id: str, remote_group_name, plan: bool = False
     ) -> dict[str, list]:
         """Delete roles for a remote group if there is no corresponding group.
 
@@ -244,13 +266,26 @@ class RemoteGroupDataService(Service):
         Its role-based memberships will be replaced by individual memberships
         for each currently-assigned user.
 
+        Each collection is disowned through a recorded group collections
+        job. If disowning fails, the job keeps a checkpoint of the members
+        already reassigned, and a RuntimeError naming the job is raised
+        before any roles are deleted. Running this method again resumes
+        the failed job from its checkpoint instead of starting a new one.
+
         Once any group collections have been disowned, any dangling Invenio
         roles will be deleted.
 
+        If ``plan`` is True, nothing is changed. The return value then lists
+        the collections that would be disowned and the roles that would be
+        deleted, with the plan for each collection under "disown_plans" (see
+        ``GroupCollectionsService.disown``).
+
         # FIXME: What about the case of an orphaned group collection that is
         # soft-deleted? restored?
         """
         disowned_communities = []
+        disown_jobs = []
+        disown_plans = []
         deleted_roles = []
 
         query_params = (
@@ -263,21 +298,54 @@ class RemoteGroupDataService(Service):
         )
 
         # make flat list of role names for all the slugs
-        for community in community_list.to_dict()["hits"]["hits"]:
+        for community in community_list.hits:
             # find all users with the group roles
-            if not community["deletion_status"]["is_deleted"]:
-                disowned_community = current_group_collections_service.disown(
-                    system_identity,
-                    community["id"],
-                    community["slug"],
-                    remote_group_id,
-                    idp,
+            if community["deletion_status"]["is_deleted"]:
+                continue
+            if plan:
+                disown_plans.append(
+                    current_group_collections_service.disown(
+                        system_identity,
+                        community["id"],
+                        community["slug"],
+                        remote_group_id,
+                        idp,
+                        plan=True,
+                    )
+                )
+                disowned_communities.append(community["slug"])
+                continue
+            job = current_group_collections_service.submit_job(
+                system_identity,
+                "disown",
+                eager=True,
+                key=f"disown:{community['id']}",
+                collection_id=community["id"],
+                collection_slug=community["slug"],
+                remote_group_id=remote_group_id,
+                remote_instance_name=idp,
+                refresh=False,
+            )
+            disown_jobs.append(job["id"])
+            if job["status"] != "succeeded":
+                raise RuntimeError(
+                    f"Failed to disown collection {community['slug']} "
+                    f"(job {job['id']}): {job['error']['message']}"
                 )
-                disowned_communities.append(disowned_community["slug"])
+            disowned_communities.append(job["result"]["collection"])
+        if disowned_communities and not plan:
+            # one refresh for all of the disowned collections
+            current_group_collections_service.refresh_index()
 
         stranded_roles = self.group_role_component.get_roles_for_remote_group(
             remote_group_id=remote_group_id, idp=idp
         )
+        if plan:
+            return {
+                "disowned_communities": disowned_communities,
+                "disown_plans": disown_plans,
+                "deleted_roles": [role.id for role in stranded_roles],
+            }
         for role in stranded_roles:
             # the query above returns a list of GroupItem objects that
             # can't be used to delete the roles straightforwardly
@@ -290,6 +358,7 @@ class RemoteGroupDataService(Service):
 
         return {
             "disowned_communities": disowned_communities,
+            "disown_jobs": disown_jobs,
             "deleted_roles": deleted_roles,
         }
 
@@ -513,7 +582,10 @@ class RemoteUserDataService(Service):
                 remote_id = getattr(user, users_config["remote_identifier"])
             api_url = f'{users_config["remote_endpoint"]}{remote_id}'
 
-            callfuncs = {"GET": requests.get, "POST": requests.post}
+            callfuncs = {
+                "GET": current_group_collections_api_client.get,
+                "POST": current_group_collections_api_client.post,
+            }
             callfunc = callfuncs[users_config["remote_method"]]
 
             headers = {}
@@ -522,7 +594,10 @@ class RemoteUserDataService(Service):
             self.logger.debug(f"API URL: {api_url}")
             try:
                 response = callfunc(
-                    api_url, headers=headers, verify=False, timeout=30
+                    api_url,
+                    commons_instance=idp,
+                    headers=headers,
+                    verify=False,
                 )
                 if response.status_code != 200:
                     self.logger.error(
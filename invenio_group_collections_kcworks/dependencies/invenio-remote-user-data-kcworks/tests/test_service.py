@@ -784,6 +784,7 @@ def test_delete_group_from_remote(
 
     assert actual == {
         "disowned_communities": [],
+        "disown_jobs": [],
         "deleted_roles": [
             "knowledgeCommons---1004290|member",
             "knowledgeCommons---1004290|admin",
@@ -1056,6 +1057,7 @@ def test_delete_group_from_remote_with_community(
     )
 
     # confirm that the return value reporting the operations is correct
+    assert len(actual.pop("disown_jobs")) == 1
     assert actual == {
         "disowned_communities": [existing_collection["slug"]],
         "deleted_roles": [
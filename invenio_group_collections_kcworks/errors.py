@@ -25,3 +25,11 @@ class RoleNotCreatedError(Exception):
 
 class CollectionNotCreatedError(Exception):
     pass
+
+
+class AvatarNotFetchedError(Exception):
+    pass
+
+
+class JobRunningError(Exception):
+    pass
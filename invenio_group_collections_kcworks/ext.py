@@ -10,12 +10,25 @@
 for InvenioRDM.
 """
 
+from flask import current_app, has_app_context
+from invenio_accounts.models import Role, User
+from sqlalchemy import event, inspect
+
 from invenio_group_collections_kcworks.views import (
     GroupCollectionsResource,
     GroupCollectionsResourceConfig,
 )
 
 from . import config
+from .api_client import CommonsAPIClient
+from .cache import (
+    CollectionJobStore,
+    CollectionOwnerCache,
+    CollectionResponseCache,
+    CollectionSlugCache,
+    GroupMetadataCache,
+    GroupNotFoundCache,
+)
 from .service import (
     GroupCollectionsService,
 )
@@ -24,6 +37,71 @@ from .service_config import (
 )
 
 
+OWNER_ATTRIBUTES = {User: ("email", "roles"), Role: ("name",)}
+"""Columns and relationships of users and roles that can change which ids
+own new collections (see ``find_collection_owner``)."""
+
+
+def owner_attribute_keys(mapper) -> list[str]:
+    """Return the mapped attribute keys of a model's owner attributes.
+
+    invenio-accounts maps some columns (e.g. ``email``) to underscored
+    attributes behind hybrid properties, so the columns are resolved to
+    whatever attribute the mapper holds them under.
+    """
+    keys = []
+    for name in OWNER_ATTRIBUTES[mapper.class_]:
+        if name in mapper.relationships:
+            keys.append(name)
+        else:
+            column = mapper.local_table.c[name]
+            keys.append(mapper.get_property_by_column(column).key)
+    return keys
+
+
+def clear_owner_cache(mapper, connection, target):
+    """Clear the current app's collection owner cache.
+
+    SQLAlchemy listener for inserts and deletes of users and roles.
+    """
+    if not has_app_context():
+        return
+    ext = current_app.extensions.get("invenio-group-collections-kcworks")
+    if ext is not None:
+        ext.owner_cache.clear()
+
+
+def clear_owner_cache_on_update(mapper, connection, target):
+    """Clear the collection owner cache if an owner attribute changed.
+
+    SQLAlchemy listener for updates of users and roles. Users are updated
+    on every login, so the cache is only cleared when a user's email or
+    roles, or a role's name, actually changed.
+    """
+    state = inspect(target)
+    if any(
+        state.attrs[key].history.has_changes() for key in owner_attribute_keys(mapper)
+    ):
+        clear_owner_cache(mapper, connection, target)
+
+
+def register_owner_cache_listeners():
+    """Listen for changes to users and roles, unless already listening.
+
+    The listeners are registered on the models, which are shared by every
+    app in the process, so they act on whichever app is current.
+    """
+    listeners = {
+        "after_insert": clear_owner_cache,
+        "after_update": clear_owner_cache_on_update,
+        "after_delete": clear_owner_cache,
+    }
+    for model in OWNER_ATTRIBUTES:
+        for event_name, listener in listeners.items():
+            if not event.contains(model, event_name, listener):
+                event.listen(model, event_name, listener)
+
+
 class InvenioGroupCollections:
     """invenio-group-collections-kcworks extension."""
 
@@ -38,10 +116,26 @@ class InvenioGroupCollections:
         :param app: The Flask application.
         """
         self.init_config(app)
+        self.init_caches(app)
+        self.init_api_client(app)
         self.init_service(app)
         self.init_resources(app)
         app.extensions["invenio-group-collections-kcworks"] = self
 
+    def init_caches(self, app):
+        """Initialize in-process caches and their invalidation hooks."""
+        self.owner_cache = CollectionOwnerCache(app)
+        self.slug_cache = CollectionSlugCache(app)
+        self.response_cache = CollectionResponseCache(app)
+        self.job_store = CollectionJobStore(app)
+        register_owner_cache_listeners()
+
+    def init_api_client(self, app):
+        """Initialize the pooled client for Commons API requests."""
+        self.metadata_cache = GroupMetadataCache(app)
+        self.not_found_cache = GroupNotFoundCache(app)
+        self.api_client = CommonsAPIClient(app, metadata_cache=self.metadata_cache)
+
     def init_service(self, app):
         """Initialize service."""
         self.collections_service = GroupCollectionsService(
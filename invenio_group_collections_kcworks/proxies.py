@@ -20,3 +20,8 @@ current_group_collections_service = LocalProxy(
     lambda: current_group_collections.collections_service
 )
 """Proxy to the extension."""
+
+current_group_collections_api_client = LocalProxy(
+    lambda: current_group_collections.api_client
+)
+"""Proxy to the pooled client for Commons API requests."""
@@ -0,0 +1,49 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Result classes for group collection searches."""
+
+from collections.abc import Iterator
+
+
+class CollectionProjectionList:
+    """List of collections projected to a subset of their fields.
+
+    Wraps a raw search response for a search that requested only some
+    ``_source`` fields. The hits are the trimmed index documents rather
+    than full community serializations, so they are not passed through
+    the communities schema and carry no links.
+    """
+
+    def __init__(self, results, params: dict | None = None):
+        """Constructor.
+
+        params:
+            results: The raw search response.
+            params: The search params, used to report the sort order.
+        """
+        self._results = results
+        self._params = params or {}
+
+    @property
+    def total(self) -> int:
+        """Total number of hits matching the search."""
+        return self._results.hits.total["value"]
+
+    @property
+    def hits(self) -> Iterator[dict]:
+        """Iterator over the projected hits."""
+        for hit in self._results:
+            yield hit.to_dict()
+
+    def to_dict(self) -> dict:
+        """Return the results as a dictionary."""
+        res = {"hits": {"hits": list(self.hits), "total": self.total}}
+        if self._params.get("sort"):
+            res["sortBy"] = self._params["sort"]
+        return res
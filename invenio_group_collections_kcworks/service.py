@@ -6,16 +6,19 @@
 # and/or modify it under the terms of the MIT License; see
 # LICENSE file for more details.
 
+import hashlib
+import json
+import math
 import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from pprint import pformat
 
 import marshmallow as ma
 import requests
 from flask import current_app as app
 from flask_principal import Identity
 from invenio_access.permissions import system_identity
-from invenio_accounts.proxies import current_datastore as accounts_datastore
 from invenio_communities.communities.services.results import (
     CommunityItem,
     CommunityListResult,
@@ -25,10 +28,14 @@ from invenio_communities.errors import (
     DeletionStatusError,
     OpenRequestsForCommunityDeletionError,
 )
-from invenio_communities.members.errors import AlreadyMemberError
 from invenio_communities.proxies import current_communities
+from invenio_db import db
+from invenio_pidstore.errors import PIDDoesNotExistError
+from invenio_records_resources.services import LinksTemplate
 from invenio_records_resources.services.records.service import RecordService
-from invenio_search.proxies import current_search_client
+from invenio_records_resources.services.uow import TaskOp, UnitOfWork
+from invenio_search.engine import dsl
+from PIL import UnidentifiedImageError
 from werkzeug.exceptions import (  # Unauthorized,
     Forbidden,
     NotFound,
@@ -37,51 +44,182 @@ from werkzeug.exceptions import (  # Unauthorized,
 )
 
 from .errors import (
-    CollectionAlreadyExistsError,
+    AvatarNotFetchedError,
     CollectionNotCreatedError,
     CollectionNotFoundError,
     CommonsGroupNotFoundError,
     RoleNotCreatedError,
 )
+from .proxies import current_group_collections
+from .proxies import current_group_collections_api_client as api_client
+from .results import CollectionProjectionList
+from .service_config import GroupCollectionsFilterParam
+from .tasks import run_collection_job, update_collection_avatar
 from .utils import (
-    add_user_to_community,
+    add_members_to_community,
+    allocate_group_slug,
+    bulk_find_or_create_roles,
+    decode_search_cursor,
+    encode_search_cursor,
+    find_collection_id_by_slug,
+    find_collection_owner,
+    find_group_member_users,
+    find_group_memberships,
     make_base_group_slug,
     map_remote_roles_to_permissions,
+    member_batch_size,
+    normalize_avatar,
 )
 
 
 class GroupCollectionsService(RecordService):
     """Service for managing group collections."""
 
+    job_operations = ["create", "delete", "disown"]
+    """Operations that can be run in the background with ``submit_job``."""
+
     def __init__(self, config: dict = {}, **kwargs):
         """Constructor."""
         super().__init__(config=config, **kwargs)
 
-    def update_avatar(self, commons_avatar_url: str, community_record_id: str) -> bool:
+    def update_avatar(
+        self,
+        commons_avatar_url: str,
+        community_record_id: str,
+        commons_instance: str | None = None,
+        raise_errors: bool = False,
+    ) -> bool:
         """Update the avatar of a community in Invenio from the provided url.
 
         params:
             commons_avatar_url: The URL of the avatar to fetch.
             community_record_id: The ID of the community to update.
+            commons_instance: The name of the Commons instance serving the
+                avatar. Used to pick the pooled connection and timeout.
+            raise_errors: If True, failures that may succeed on a later
+                attempt (timeouts, connection errors and server errors)
+                raise an AvatarNotFetchedError instead of returning False.
+
+        Raises:
+            AvatarNotFetchedError: If ``raise_errors`` is True and the
+                avatar could not be fetched because of a transient error.
 
         Returns:
             True if the avatar was updated successfully, otherwise False.
         """
         success = False
         try:
-            avatar_response = requests.get(commons_avatar_url, timeout=15)
+            avatar_response = api_client.get(
+                commons_avatar_url, commons_instance=commons_instance, stream=True
+            )
         except requests.exceptions.Timeout:
             app.logger.error("Request to Commons instance for group avatar timed out")
+            if raise_errors:
+                raise AvatarNotFetchedError(
+                    f"Request for avatar at {commons_avatar_url} timed out"
+                )
+            return success
         except requests.exceptions.ConnectionError:
             app.logger.error(
                 "Could not connect to " "Commons instance to fetch group avatar"
             )
+            if raise_errors:
+                raise AvatarNotFetchedError(
+                    f"Could not connect to fetch avatar at {commons_avatar_url}"
+                )
+            return success
+        with avatar_response:
+            return self._handle_avatar_response(
+                avatar_response,
+                commons_avatar_url,
+                community_record_id,
+                raise_errors=raise_errors,
+            )
+
+    def _read_avatar(self, avatar_response, commons_avatar_url: str) -> bytes | None:
+        """Read a streamed avatar response, refusing oversized images.
+
+        Returns:
+            The avatar bytes, or None if the avatar is larger than
+            ``GROUP_COLLECTIONS_AVATAR_MAX_SIZE``.
+        """
+        max_size = app.config.get("GROUP_COLLECTIONS_AVATAR_MAX_SIZE", 5242880)
+        content_length = avatar_response.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > max_size:
+            app.logger.error(
+                f"Avatar at {commons_avatar_url} is larger than {max_size} bytes"
+            )
+            return None
+        buffer = BytesIO()
+        for chunk in avatar_response.iter_content(chunk_size=65536):
+            if buffer.tell() + len(chunk) > max_size:
+                app.logger.error(
+                    f"Avatar at {commons_avatar_url} is larger than {max_size} bytes"
+                )
+                return None
+            buffer.write(chunk)
+        return buffer.getvalue()
+
+    def _get_logo_source_hash(self, community_record_id: str) -> str | None:
+        """Return the hash of the avatar from which a community logo was made."""
+        record = current_communities.service.record_cls.pid.resolve(
+            community_record_id
+        )
+        if not record.files.enabled or "logo" not in record.files:
+            return None
+        return (record.files["logo"].metadata or {}).get("source_hash")
+
+    def _set_logo_source_hash(self, community_record_id: str, source_hash: str):
+        """Store the hash of the avatar from which a community logo was made."""
+        record = current_communities.service.record_cls.pid.resolve(
+            community_record_id
+        )
+        logo = record.files["logo"]
+        logo.metadata = {**(logo.metadata or {}), "source_hash": source_hash}
+        logo.commit()
+        db.session.commit()
+
+    def _handle_avatar_response(
+        self,
+        avatar_response,
+        commons_avatar_url: str,
+        community_record_id: str,
+        raise_errors: bool = False,
+    ) -> bool:
+        """Upload a fetched avatar as a community logo, or log the failure.
+
+        The logo is only replaced if the avatar differs from the one the
+        current logo was made from.
+        """
+        success = False
         if avatar_response.status_code == 200:
+            avatar = self._read_avatar(avatar_response, commons_avatar_url)
+            if avatar is None:
+                return success
+            source_hash = f"sha256:{hashlib.sha256(avatar).hexdigest()}"
+            try:
+                if self._get_logo_source_hash(community_record_id) == source_hash:
+                    app.logger.info("Avatar unchanged. Skipping logo upload.")
+                    return True
+            except Exception as e:
+                app.logger.error(f"Could not read existing logo: {e}")
+            logo = avatar
+            if app.config.get("GROUP_COLLECTIONS_AVATAR_NORMALIZE", True):
+                try:
+                    logo = normalize_avatar(avatar)
+                except UnidentifiedImageError:
+                    app.logger.warning(
+                        f"Could not decode avatar at {commons_avatar_url}. "
+                        "Uploading it unchanged."
+                    )
+                except ValueError as e:
+                    app.logger.error(f"Avatar at {commons_avatar_url} refused: {e}")
+                    return success
             try:
                 logo_result = current_communities.service.update_logo(
                     system_identity,
                     community_record_id,
-                    stream=BytesIO(avatar_response.content),
+                    stream=BytesIO(logo),
                 )
                 if logo_result is not None:
                     app.logger.info("Logo uploaded successfully.")
@@ -90,6 +228,11 @@ class GroupCollectionsService(RecordService):
                     app.logger.error("Logo upload failed silently in Invenio.")
             except Exception as e:
                 app.logger.error(f"Logo upload failed: {e}")
+            if success:
+                try:
+                    self._set_logo_source_hash(community_record_id, source_hash)
+                except Exception as e:
+                    app.logger.error(f"Could not store logo source hash: {e}")
         elif avatar_response.status_code in [400, 405, 406, 412, 413]:
             app.logger.error(
                 "Request was not accepted when trying to access "
@@ -110,39 +253,339 @@ class GroupCollectionsService(RecordService):
                 f" at {commons_avatar_url}"
             )
             app.logger.error(f"Response: {avatar_response.text}")
-        elif avatar_response.status_code in [500, 502, 503, 504, 509, 511]:
+        elif avatar_response.status_code in [429, 500, 502, 503, 504, 509, 511]:
             app.logger.error(
                 f"Connection failed when trying to access the "
                 f"provided avatar at {commons_avatar_url}"
             )
             app.logger.error(f"Response: {avatar_response.text}")
+            if raise_errors:
+                raise AvatarNotFetchedError(
+                    f"Avatar server responded {avatar_response.status_code} "
+                    f"for {commons_avatar_url}"
+                )
 
         return success
 
+    def schedule_avatar_update(
+        self,
+        commons_avatar_url: str,
+        community_record_id: str,
+        commons_instance: str | None = None,
+    ) -> None:
+        """Update a community's avatar in the background.
+
+        The avatar is downloaded and uploaded as the community logo by a
+        Celery task, which retries with exponential backoff when the avatar
+        server is slow or unavailable. The task is only queued once the
+        current database transaction has been committed, so that the worker
+        can find the community. If ``GROUP_COLLECTIONS_AVATAR_ASYNC`` is
+        False the update runs synchronously instead.
+
+        params:
+            commons_avatar_url: The URL of the avatar to fetch.
+            community_record_id: The ID of the community to update.
+            commons_instance: The name of the Commons instance serving the
+                avatar.
+        """
+        if app.config.get("GROUP_COLLECTIONS_AVATAR_ASYNC", True):
+            with UnitOfWork(db.session) as uow:
+                uow.register(
+                    TaskOp(
+                        update_collection_avatar,
+                        commons_avatar_url,
+                        str(community_record_id),
+                        commons_instance,
+                    )
+                )
+                uow.commit()
+        else:
+            self.update_avatar(
+                commons_avatar_url, community_record_id, commons_instance=commons_instance
+            )
+
     def read(
         self,
         identity: Identity,
         slug: str,
-    ) -> CommunityItem:
+        fields: list[str] | None = None,
+    ) -> dict:
         """Read a collection (community) by its slug.
 
+        The slug is resolved to a community id through the database (with
+        an in-process cache), and the community is then read by id. So a
+        collection can be read straight after it is created, without
+        waiting for the search index to refresh.
+
+        params:
+            identity: The Identity of the user making the request. [required]
+            slug: The slug of the collection. [required]
+            fields: If provided, only these fields of the collection's
+                index document (plus its id) are fetched and returned.
+
         Raises:
             CollectionNotFoundError: If no collection is found in Invenio with
             the given slug.
+            ma.ValidationError: If a requested field may not be projected.
 
         Returns:
-            A CommunityItem object representing the collection.
+            A dictionary representing the collection.
         """
-        community_list = current_communities.service.search(
-            identity=identity, q=f"slug:{slug}"
-        )
+        result = self.read_result(identity, slug, fields=fields)
+        if fields:
+            return next(result.hits)
+        return result.to_dict()
 
-        if community_list.total == 0:
+    def read_result(
+        self,
+        identity: Identity,
+        slug: str,
+        fields: list[str] | None = None,
+    ) -> CommunityItem | CollectionProjectionList:
+        """Read a collection (community) by its slug, without serializing it.
+
+        As ``read``, but returns the result object, so that the versions
+        of the collection can be taken from it with ``result_versions``.
+
+        Raises:
+            CollectionNotFoundError: If no collection is found in Invenio with
+            the given slug.
+            ma.ValidationError: If a requested field may not be projected.
+
+        Returns:
+            A CommunityItem, or a CollectionProjectionList with one hit if
+            fields were requested.
+        """
+        if fields:
+            params = {"size": 1}
+            search = self._collection_search(
+                identity, params, fields, extra_filter=dsl.Q("term", slug=slug)
+            )
+            community_list = CollectionProjectionList(search.execute(), params)
+            if community_list.total == 0:
+                raise CollectionNotFoundError(
+                    f"No collection found with the slug {slug}"
+                )
+            return community_list
+
+        slug_cache = current_group_collections.slug_cache
+        community_id = slug_cache.get(slug)
+        if community_id:
+            result = self._read_community(identity, community_id)
+            # the slug may have been changed or re-used since it was cached
+            if result is not None and result["slug"] == slug:
+                return result
+            slug_cache.delete(slug)
+
+        community_id = find_collection_id_by_slug(slug)
+        result = self._read_community(identity, community_id) if community_id else None
+        if result is None:
             raise CollectionNotFoundError(f"No collection found with the slug {slug}")
-        result = next(community_list.hits)
+        slug_cache.set(slug, community_id)
 
         return result
 
+    def read_many(
+        self,
+        identity: Identity,
+        slugs: list[str],
+        fields: list[str] | None = None,
+    ) -> dict[str, dict | None]:
+        """Read several collections (communities) by their slugs.
+
+        All of the collections are fetched with a single ``terms`` query
+        on the slug field of the communities index.
+
+        params:
+            identity: The Identity of the user making the request. [required]
+            slugs: The slugs of the collections. [required]
+            fields: If provided, only these fields of each collection's
+                index document (plus its id and slug) are fetched and
+                returned.
+
+        Raises:
+            ma.ValidationError: If more than
+                ``GROUP_COLLECTIONS_BATCH_READ_MAX`` slugs are requested or
+                a requested field may not be projected.
+
+        Returns:
+            A dictionary with each requested slug as a key. The value is a
+            dictionary representing the collection, or None if no
+            collection was found with that slug.
+        """
+        slugs = list(dict.fromkeys(slugs))
+        max_slugs = app.config.get("GROUP_COLLECTIONS_BATCH_READ_MAX", 100)
+        if len(slugs) > max_slugs:
+            raise ma.ValidationError(
+                f"At most {max_slugs} collections can be read at once."
+            )
+        if not slugs:
+            return {}
+
+        params = {"size": len(slugs)}
+        slug_filter = dsl.Q("terms", slug=slugs)
+        if fields:
+            search = self._collection_search(
+                identity,
+                params,
+                list(dict.fromkeys(["slug", *fields])),
+                extra_filter=slug_filter,
+            )
+            community_list = CollectionProjectionList(search.execute(), params)
+        else:
+            community_list = current_communities.service.search(
+                identity=identity, params=params, extra_filter=slug_filter
+            )
+
+        collections = dict.fromkeys(slugs)
+        for hit in community_list.hits:
+            collections[hit["slug"]] = hit
+            if not fields:
+                current_group_collections.slug_cache.set(hit["slug"], hit["id"])
+
+        return collections
+
+    def _read_community(
+        self, identity: Identity, community_id: str
+    ) -> CommunityItem | None:
+        """Read a community by id, returning None if it is missing or deleted."""
+        try:
+            return current_communities.service.read(identity, community_id)
+        except (CommunityDeletedError, PIDDoesNotExistError):
+            return None
+
+    def _projection_fields(self, fields: list[str]) -> list[str]:
+        """Validate requested projection fields and add the id field.
+
+        Only fields at or below one of the top-level fields listed in
+        ``GROUP_COLLECTIONS_PROJECTION_FIELDS`` may be requested.
+
+        Raises:
+            ma.ValidationError: If a requested field may not be projected.
+        """
+        allowed = app.config.get("GROUP_COLLECTIONS_PROJECTION_FIELDS", [])
+        disallowed = [f for f in fields if f.split(".")[0] not in allowed]
+        if disallowed:
+            raise ma.ValidationError(
+                f"Fields {', '.join(disallowed)} are not available. "
+                f"Available fields are: {', '.join(allowed)}"
+            )
+        return list(dict.fromkeys(["id", *fields]))
+
+    def _collection_search(
+        self,
+        identity: Identity,
+        params: dict,
+        fields: list[str] | None = None,
+        extra_filter=None,
+        search_opts=None,
+    ):
+        """Build the communities search for reading or searching collections.
+
+        Without ``fields`` this is the search the communities service's
+        own ``search`` runs. With ``fields``, only those fields are
+        requested as ``_source`` includes, so that OpenSearch only loads
+        and returns those parts of each document, and deleted communities
+        are excluded.
+
+        Each hit carries its document version, which is the revision id
+        of the community, so that ``result_versions`` can read it.
+        """
+        communities_service = current_communities.service
+        communities_service.require_permission(identity, "search")
+
+        if fields:
+            deleted_filter = ~dsl.Q("term", is_deleted=True)
+            search = communities_service._search(
+                "search",
+                identity,
+                params,
+                None,
+                search_opts=search_opts,
+                extra_filter=(
+                    deleted_filter & extra_filter if extra_filter else deleted_filter
+                ),
+            )
+            search = search.source(includes=self._projection_fields(fields))
+        else:
+            search = communities_service._search(
+                "search",
+                identity,
+                params,
+                None,
+                search_opts=search_opts,
+                extra_filter=extra_filter,
+                # as the communities service's search
+                permission_action="read_deleted",
+            )
+
+        return search.extra(version=True)
+
+    def _collection_list(
+        self,
+        identity: Identity,
+        search_result,
+        params: dict,
+        fields: list[str] | None = None,
+        links: bool = True,
+    ) -> CommunityListResult | CollectionProjectionList:
+        """Wrap a raw collections search response in a result list."""
+        if fields:
+            return CollectionProjectionList(search_result, params)
+
+        communities_service = current_communities.service
+        return communities_service.result_list(
+            communities_service,
+            identity,
+            search_result,
+            params,
+            links_tpl=(
+                LinksTemplate(
+                    communities_service.config.links_search, context={"args": params}
+                )
+                if links
+                else None
+            ),
+            links_item_tpl=communities_service.links_item_tpl,
+            expandable_fields=communities_service.expandable_fields,
+        )
+
+    def _search_params(
+        self,
+        commons_instance: str | None,
+        commons_group_id: str | None,
+        sort: str | None,
+        size: int | None,
+        page: int | None,
+    ) -> dict:
+        """Return the communities search params for a collections search."""
+        return {
+            "commons_instance": commons_instance,
+            "commons_group_id": commons_group_id,
+            "sort": sort,
+            "size": int(size) if size else 10,
+            "page": int(page) if page else 1,
+        }
+
+    def _collection_search_options(self) -> type:
+        """Return the communities search options extended for collections.
+
+        Adds GroupCollectionsFilterParam to the params interpreters of the
+        communities service search, so that the ``commons_instance`` and
+        ``commons_group_id`` search params are applied as keyword filters.
+        """
+        search_opts = current_communities.service.config.search
+        return type(
+            "GroupCollectionsSearchOptions",
+            (search_opts,),
+            {
+                "params_interpreters_cls": [
+                    *search_opts.params_interpreters_cls,
+                    GroupCollectionsFilterParam,
+                ]
+            },
+        )
+
     def search(
         self,
         identity: Identity,
@@ -151,7 +594,8 @@ class GroupCollectionsService(RecordService):
         sort: str | None = "updated-desc",
         size: int | None = 10,
         page: int | None = 1,
-    ) -> CommunityListResult:
+        fields: list[str] | None = None,
+    ) -> CommunityListResult | CollectionProjectionList:
         """Search collections (communities) by Commons instance and group ID.
 
         params:
@@ -161,6 +605,8 @@ class GroupCollectionsService(RecordService):
             sort: The sort order for the results.
             size: The number of results to return.
             page: The page number of the results to return.
+            fields: If provided, only these fields of each collection's
+                index document (plus its id) are fetched and returned.
 
         Although commons_instance and commons_group_id are optional, at least
         one of them must be provided.
@@ -175,36 +621,483 @@ class GroupCollectionsService(RecordService):
             UnprocessableEntityError: If the query parameters are invalid.
 
         Returns:
-            Returns a CommunityListResult object.
+            Returns a CommunityListResult object, or a
+            CollectionProjectionList if fields were requested.
         """
-        query_params = "+_exists_:custom_fields.kcr\:commons_instance "  # noqa
-        if commons_instance:
-            query_params += (
-                f"+custom_fields.kcr\:commons_instance:"  # noqa: W605
-                f"{commons_instance} "
-            )
-        if commons_group_id:
-            query_params += (
-                f"+custom_fields.kcr\:commons_group_id:"  # noqa: W605
-                f"{commons_group_id}"
-            )
-        community_list = current_communities.service.search(
-            identity=identity,
-            params={
-                "q": query_params,
-                "sort": sort,
-                "size": int(size) if size else 10,
-                "page": int(page) if page else 1,
-            },
+        params = self._search_params(
+            commons_instance, commons_group_id, sort, size, page
+        )
+        search = self._collection_search(
+            identity, params, fields, search_opts=self._collection_search_options()
+        )
+        community_list = self._collection_list(
+            identity, search.execute(), params, fields
         )
 
-        if community_list.to_dict()["hits"]["total"] == 0:
+        # Check the total from the raw search response, so that the hits
+        # are only serialized once, when the view renders the page.
+        if community_list.total == 0:
             raise CollectionNotFoundError(
-                f"No Works collection found matching the parameters {query_params}"
+                f"No Works collection found matching the parameters "
+                f"commons_instance={commons_instance}, "
+                f"commons_group_id={commons_group_id}"
             )
 
         return community_list
 
+    def _search_after_query(
+        self,
+        identity: Identity,
+        commons_instance: str | None,
+        commons_group_id: str | None,
+        sort: str,
+        size: int,
+        search_after: list | None = None,
+        fields: list[str] | None = None,
+        includes: list[str] | None = None,
+    ) -> tuple:
+        """Build the search for one page of collections using ``search_after``.
+
+        The sort order given by ``sort`` is made stable by adding the
+        community id as a tiebreaker. If ``fields`` are given, only those
+        fields (plus the id) are fetched. ``includes`` sets the fetched
+        ``_source`` fields directly, without checking them against the
+        fields that may be projected. Each hit carries its document
+        version, as for ``_collection_search``.
+
+        Returns:
+            A tuple of the search and the search params.
+        """
+        communities_service = current_communities.service
+        communities_service.require_permission(identity, "search")
+
+        params = {
+            "commons_instance": commons_instance,
+            "commons_group_id": commons_group_id,
+            "sort": sort,
+            "size": size,
+        }
+        search_opts = self._collection_search_options()
+        sort_fields = list(search_opts.sort_options[sort]["fields"])
+        tiebreak = "-id" if sort_fields[0].startswith("-") else "id"
+
+        search = communities_service._search(
+            "search",
+            identity,
+            params,
+            None,
+            search_opts=search_opts,
+            extra_filter=~dsl.Q("term", is_deleted=True),
+        )
+        search = search.sort(*sort_fields, tiebreak)[:size]
+        if search_after:
+            search = search.extra(search_after=search_after)
+        if fields:
+            includes = self._projection_fields(fields)
+        if includes:
+            search = search.source(includes=includes)
+
+        return search.extra(version=True), params
+
+    def _search_after_page(self, identity: Identity, *args, **kwargs) -> tuple:
+        """Fetch one page of collections using ``search_after``.
+
+        Takes the same arguments as ``_search_after_query``.
+
+        Returns:
+            A tuple of the raw search response and the search params.
+        """
+        search, params = self._search_after_query(identity, *args, **kwargs)
+        return search.execute(), params
+
+    def search_after(
+        self,
+        identity: Identity,
+        commons_instance: str,
+        commons_group_id: str | None = None,
+        sort: str | None = "updated-desc",
+        size: int | None = 25,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> tuple[CommunityListResult | CollectionProjectionList, str | None]:
+        """Page through collections with an opaque ``search_after`` cursor.
+
+        Unlike ``search``, the cost of fetching a page does not grow with
+        its depth and the pages are not limited by the index's
+        ``max_result_window``.
+
+        params:
+            identity: The Identity of the user making the request. [required]
+            commons_instance: The name of the Commons instance.
+            commons_group_id: The ID of the group on the Commons instance.
+            sort: The sort order for the results.
+            size: The number of results to return.
+            cursor: The ``next`` cursor returned with the previous page.
+                If omitted, the first page is returned.
+            fields: If provided, only these fields of each collection's
+                index document (plus its id) are fetched and returned.
+
+        Raises:
+            CollectionNotFoundError: If no collections are found matching
+                the parameters.
+            ma.ValidationError: If the cursor is invalid or was made for a
+                different sort order.
+
+        Returns:
+            A tuple of a CommunityListResult (or CollectionProjectionList if
+            fields were requested) for the page and the cursor for the next
+            page (None if this is the last page).
+        """
+        size = int(size) if size else 25
+        sort = sort or "updated-desc"
+        search_after = None
+        if cursor:
+            try:
+                search_after = decode_search_cursor(cursor, sort)
+            except ValueError as e:
+                raise ma.ValidationError(str(e))
+
+        search_result, params = self._search_after_page(
+            identity,
+            commons_instance,
+            commons_group_id,
+            sort,
+            size,
+            search_after,
+            fields=fields,
+        )
+        if search_result.hits.total["value"] == 0:
+            raise CollectionNotFoundError(
+                f"No Works collection found matching the parameters "
+                f"commons_instance={commons_instance}, "
+                f"commons_group_id={commons_group_id}"
+            )
+
+        next_cursor = None
+        if len(search_result.hits) == size:
+            next_cursor = encode_search_cursor(
+                sort, search_result.hits[-1].meta.sort
+            )
+
+        community_list = self._collection_list(
+            identity, search_result, params, fields, links=False
+        )
+
+        return community_list, next_cursor
+
+    def collection_versions(
+        self,
+        identity: Identity,
+        slug: str | None = None,
+        commons_instance: str | None = None,
+        commons_group_id: str | None = None,
+        sort: str | None = "updated-desc",
+        size: int | None = 10,
+        page: int | None = 1,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> list[list]:
+        """Return the versions of the collections a read or search returns.
+
+        This is a cheap stand-in for ``read`` (if a slug is given),
+        ``search`` or ``search_after`` (if a cursor is given, even an empty
+        one), used to check ETags. It runs the same query as the read or
+        search it stands in for, but fetches no ``_source``, so no
+        collection is loaded or serialized. A slug read without fields is
+        looked up in the database, as ``read`` does.
+
+        params:
+            identity: The Identity of the user making the request. [required]
+            slug: The slug of a collection to read.
+            commons_instance, commons_group_id, sort, size, page, cursor,
+            fields: The search parameters, as for ``read``, ``search`` and
+                ``search_after``.
+
+        Raises:
+            ma.ValidationError: If the cursor is invalid or a requested
+                field may not be projected.
+
+        Returns:
+            A list of [collection id, revision id] pairs in result order,
+            as ``result_versions`` returns for the read or search. The list
+            is empty if nothing matches.
+        """
+        if slug and not fields:
+            community_id = find_collection_id_by_slug(slug)
+            if not community_id:
+                return []
+            model_cls = current_communities.service.record_cls.model_cls
+            model = model_cls.query.filter_by(id=community_id).one_or_none()
+            # a record's revision id is one less than its model's version id
+            return [[str(model.id), model.version_id - 1]] if model else []
+
+        if slug:
+            search = self._collection_search(
+                identity, {"size": 1}, fields, extra_filter=dsl.Q("term", slug=slug)
+            )
+        elif cursor is not None:
+            sort = sort or "updated-desc"
+            try:
+                search_after = decode_search_cursor(cursor, sort) if cursor else None
+            except ValueError as e:
+                raise ma.ValidationError(str(e))
+            search, _ = self._search_after_query(
+                identity,
+                commons_instance,
+                commons_group_id,
+                sort,
+                int(size) if size else 25,
+                search_after,
+                fields=fields,
+            )
+        else:
+            search = self._collection_search(
+                identity,
+                self._search_params(
+                    commons_instance, commons_group_id, sort, size, page
+                ),
+                fields,
+                search_opts=self._collection_search_options(),
+            )
+
+        return self.result_versions(search.source(False).execute())
+
+    def result_versions(self, result) -> list[list]:
+        """Return the versions of the collections in a read or search result.
+
+        params:
+            result: A CommunityItem, a CommunityListResult or
+                CollectionProjectionList from this service, or a raw search
+                response from one of its searches.
+
+        Returns:
+            A list of [collection id, revision id] pairs, in result order.
+        """
+        if isinstance(result, CommunityItem):
+            return [[str(result._record.id), result._record.revision_id]]
+        if isinstance(result, (CommunityListResult, CollectionProjectionList)):
+            result = result._results
+        return [[hit.meta.id, hit.meta.version] for hit in result]
+
+    def export(
+        self,
+        identity: Identity,
+        commons_instance: str | None = None,
+        commons_group_id: str | None = None,
+        page_size: int | None = None,
+    ) -> Iterator[str]:
+        """Export all matching collections as newline-delimited JSON.
+
+        Walks the collections in ``search_after`` pages of ``page_size``
+        (``GROUP_COLLECTIONS_EXPORT_PAGE_SIZE`` by default). Each
+        collection is yielded as soon as its page is fetched, as one
+        compact JSON line, so memory use does not grow with the number
+        of collections.
+
+        params:
+            identity: The Identity of the user making the request. [required]
+            commons_instance: The name of the Commons instance. If omitted,
+                collections for all instances are exported.
+            commons_group_id: The ID of the group on the Commons instance.
+
+        Returns:
+            An iterator of JSON lines, each ending with a newline.
+        """
+        communities_service = current_communities.service
+        size = page_size or app.config.get("GROUP_COLLECTIONS_EXPORT_PAGE_SIZE", 500)
+        search_after = None
+        while True:
+            search_result, params = self._search_after_page(
+                identity,
+                commons_instance,
+                commons_group_id,
+                "oldest",
+                size,
+                search_after,
+            )
+            community_list = communities_service.result_list(
+                communities_service,
+                identity,
+                search_result,
+                params,
+                links_item_tpl=communities_service.links_item_tpl,
+            )
+            for hit in community_list.hits:
+                yield json.dumps(hit, separators=(",", ":"), default=str) + "\n"
+            if len(search_result.hits) < size:
+                break
+            search_after = list(search_result.hits[-1].meta.sort)
+
+    def _group_invenio_roles(
+        self,
+        commons_instance: str,
+        commons_group_id: str,
+        moderate_roles: list[str],
+        upload_roles: list[str],
+    ) -> dict[str, list[str]]:
+        """Map a Commons group's roles to Invenio role names by permission.
+
+        Every group gets at least a "member" role.
+        """
+        all_roles = moderate_roles + upload_roles
+        if "member" not in all_roles:
+            all_roles.append("member")
+
+        return map_remote_roles_to_permissions(
+            f"{commons_instance}---{commons_group_id}",
+            all_roles,
+        )
+
+    def _prefetch_group_metadata(self, groups: list[tuple[str, str]]) -> dict:
+        """Fetch metadata for many Commons groups concurrently.
+
+        The requests are made through the API client, so the responses
+        also populate the group metadata cache. A later ``create`` for
+        one of these groups then reads its metadata from the cache.
+
+        Up to ``GROUP_COLLECTIONS_BULK_CREATE_CONCURRENCY`` requests are
+        made at once. Groups that are missing, unknown or could not be
+        fetched are left out of the result, so that ``create`` can
+        report the error for them.
+
+        params:
+            groups: A list of (commons_instance, commons_group_id) tuples.
+
+        Returns:
+            A dictionary mapping each fetched (commons_instance,
+            commons_group_id) tuple to the group's metadata.
+        """
+        flask_app = app._get_current_object()
+        endpoints = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"]
+        not_found_cache = current_group_collections.not_found_cache
+
+        def fetch(group: tuple[str, str]) -> dict | None:
+            commons_instance, commons_group_id = group
+            api_details = endpoints.get(commons_instance)
+            if not api_details or group in not_found_cache:
+                return None
+            token = os.environ.get(api_details["token_name"], "")
+            with flask_app.app_context():
+                try:
+                    response = api_client.get_group_metadata(
+                        commons_instance,
+                        commons_group_id,
+                        f"{api_details['url']}{commons_group_id}",
+                        headers={"Authorization": f"Bearer {token}"},
+                    )
+                    if response.status_code != 200:
+                        return None
+                    content = response.json()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    flask_app.logger.warning(
+                        f"Could not prefetch metadata for {commons_instance} "
+                        f"group {commons_group_id}: {e}"
+                    )
+                    return None
+            return content.get("results", content) if content else None
+
+        groups = list(dict.fromkeys(groups))
+        concurrency = app.config.get("GROUP_COLLECTIONS_BULK_CREATE_CONCURRENCY", 8)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            fetched = dict(zip(groups, executor.map(fetch, groups)))
+
+        return {group: content for group, content in fetched.items() if content}
+
+    def bulk_create(
+        self,
+        identity: Identity,
+        groups: list[dict],
+        restore_deleted: bool = False,
+    ) -> list[dict]:
+        """Create collections for many Commons groups.
+
+        The group metadata for all of the groups is fetched concurrently
+        up front. The Invenio roles for all of the groups are then found
+        or created in a single batch. Finally each collection is created
+        with ``create``, which reads the prefetched metadata from the
+        group metadata cache and adds the memberships for each collection
+        in batches.
+
+        A failure for one group does not stop the others from being
+        created.
+
+        params:
+            identity: The identity of the user creating the collections.
+            groups: A list of dictionaries, each with the keys
+                "commons_instance", "commons_group_id" and (optionally)
+                "collection_visibility".
+            restore_deleted: Passed on to ``create`` for each group.
+
+        Raises:
+            ma.ValidationError: If more than
+                ``GROUP_COLLECTIONS_BULK_CREATE_MAX`` groups are requested.
+
+        Returns:
+            A list with one dictionary per requested group, in the same
+            order, with the keys "commons_instance", "commons_group_id",
+            "collection" (the created collection record or None) and
+            "error" (the exception raised while creating the collection,
+            or None).
+        """
+        max_groups = app.config.get("GROUP_COLLECTIONS_BULK_CREATE_MAX", 1000)
+        if len(groups) > max_groups:
+            raise ma.ValidationError(
+                f"At most {max_groups} collections can be created at once."
+            )
+
+        metadata = self._prefetch_group_metadata(
+            [(g["commons_instance"], str(g["commons_group_id"])) for g in groups]
+        )
+
+        role_names = []
+        for (commons_instance, commons_group_id), content in metadata.items():
+            try:
+                invenio_roles = self._group_invenio_roles(
+                    commons_instance,
+                    commons_group_id,
+                    content.get("moderate_roles") or [],
+                    content.get("upload_roles") or [],
+                )
+            except Exception as e:
+                app.logger.warning(
+                    f"Could not map roles for {commons_instance} group "
+                    f"{commons_group_id}: {e}"
+                )
+                continue
+            role_names.extend(r for roles in invenio_roles.values() for r in roles)
+        if role_names:
+            bulk_find_or_create_roles(role_names)
+
+        results = []
+        for group in groups:
+            commons_instance = group["commons_instance"]
+            commons_group_id = str(group["commons_group_id"])
+            result = {
+                "commons_instance": commons_instance,
+                "commons_group_id": commons_group_id,
+                "collection": None,
+                "error": None,
+            }
+            try:
+                result["collection"] = self.create(
+                    identity,
+                    commons_group_id,
+                    commons_instance,
+                    restore_deleted=restore_deleted,
+                    collection_visibility=group.get("collection_visibility")
+                    or "public",
+                )
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(
+                    f"Could not create collection for {commons_instance} "
+                    f"group {commons_group_id}: {e}"
+                )
+                result["error"] = e
+            results.append(result)
+
+        return results
+
     def create(
         self,
         identity: Identity,
@@ -260,12 +1153,19 @@ class GroupCollectionsService(RecordService):
         api_details = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"][
             commons_instance
         ]
+        not_found_cache = current_group_collections.not_found_cache
+        if (commons_instance, commons_group_id) in not_found_cache:
+            raise CommonsGroupNotFoundError(
+                f"No such group {commons_group_id} could be found "
+                f"on {instance_name}"
+            )
         headers = {"Authorization": f"Bearer {os.environ[api_details['token_name']]}"}
         try:
-            meta_response = requests.get(
+            meta_response = api_client.get_group_metadata(
+                commons_instance,
+                commons_group_id,
                 f"{api_details['url']}{commons_group_id}",
                 headers=headers,
-                timeout=15,
             )
         except requests.exceptions.Timeout:
             raise RequestTimeout(
@@ -287,6 +1187,10 @@ class GroupCollectionsService(RecordService):
                 str(content.get("id") or ""),
             ]:
                 app.logger.debug("NOT FOUND ERROR!")
+                current_group_collections.metadata_cache.delete(
+                    commons_instance, commons_group_id
+                )
+                not_found_cache.add(commons_instance, commons_group_id)
                 raise CommonsGroupNotFoundError(
                     f"No such group {commons_group_id} could be found "
                     f"on {instance_name}"
@@ -304,9 +1208,7 @@ class GroupCollectionsService(RecordService):
 
             base_slug = make_base_group_slug(commons_group_name)
             # base_slug = content["slug"]
-            slug_incrementer = 0
-            slug = base_slug
-            app.logger.debug(f"Base slug: {slug}")
+            app.logger.debug(f"Base slug: {base_slug}")
 
         elif meta_response.status_code == 404:
             app.logger.error(
@@ -315,6 +1217,7 @@ class GroupCollectionsService(RecordService):
             )
             app.logger.error(f"Response: {meta_response.text}")
             app.logger.error(headers)
+            not_found_cache.add(commons_instance, commons_group_id)
             raise CommonsGroupNotFoundError(
                 f"No such group {commons_group_id} could be found "
                 f"on {instance_name}"
@@ -331,26 +1234,29 @@ class GroupCollectionsService(RecordService):
                 f"on {instance_name}"
             )
 
-        # create roles for the new collection's group members
-        all_roles = commons_moderate_roles + commons_upload_roles
-        if "member" not in all_roles:
-            all_roles.append("member")
+        # pick a free slug (this also detects an existing collection for
+        # the group before any roles are created)
+        slug = allocate_group_slug(
+            base_slug,
+            commons_instance,
+            commons_group_id,
+            restore_deleted=restore_deleted,
+        )
 
-        invenio_roles = map_remote_roles_to_permissions(
-            f"{commons_instance}---{commons_group_id}",
-            all_roles,
+        # create roles for the new collection's group members
+        invenio_roles = self._group_invenio_roles(
+            commons_instance,
+            commons_group_id,
+            commons_moderate_roles,
+            commons_upload_roles,
         )
-        print("GroupCollectionService creating roles")
-        print(invenio_roles)
         app.logger.debug("GroupCollectionService creating roles")
         app.logger.debug(invenio_roles)
-        for key, value in invenio_roles.items():
-            for remote_role in value:
-                my_group_role = accounts_datastore.find_or_create_role(name=remote_role)
-                accounts_datastore.commit()
-
-                if my_group_role is None:
-                    raise RoleNotCreatedError(f'Role "{remote_role}" not created.')
+        role_names = [r for roles in invenio_roles.values() for r in roles]
+        role_ids = bulk_find_or_create_roles(role_names)
+        for remote_role in role_names:
+            if remote_role not in role_ids:
+                raise RoleNotCreatedError(f'Role "{remote_role}" not created.')
 
         # create the new collection
         new_record = None
@@ -393,6 +1299,7 @@ class GroupCollectionsService(RecordService):
             },
         }
 
+        claimed_slugs = set()
         while not new_record:
             try:
                 new_record_result = current_communities.service.create(
@@ -403,109 +1310,52 @@ class GroupCollectionsService(RecordService):
                 if not new_record_result:
                     raise CollectionNotCreatedError("Failed to create new collection")
             except ma.ValidationError as e:
-                # group with slug already exists
+                # slug was claimed by a concurrent request since we
+                # allocated it
                 app.logger.error(f"Validation error: {e}")
                 if "A community with this identifier already exists" in str(e):
-                    community_list = current_communities.service.search(
-                        identity=system_identity, q=f"slug:{slug}"
+                    claimed_slugs.add(slug)
+                    slug = allocate_group_slug(
+                        base_slug,
+                        commons_instance,
+                        commons_group_id,
+                        restore_deleted=restore_deleted,
+                        exclude=claimed_slugs,
                     )
-                    if community_list.total < 1:
-                        msg = f"Collection for {instance_name} group {commons_group_id} seems to have been deleted previously and has not been restored. Continuing with a new url slug."  # noqa: E501
-                        app.logger.error(msg)
-
-                        if restore_deleted:
-                            raise NotImplementedError(
-                                "Restore deleted collection not yet implemented"
-                            )
-                        else:
-                            slug_incrementer += 1
-                            slug = f"{base_slug}-{str(slug_incrementer)}"
-                            data["slug"] = slug
-                    elif (
-                        community_list.total == 1
-                        and community_list.to_dict()["hits"]["hits"][0][
-                            "custom_fields"
-                        ]["kcr:commons_group_id"]
-                        == commons_group_id
-                    ):
-                        raise CollectionAlreadyExistsError(
-                            f"Collection for {instance_name} "
-                            f"group {commons_group_id} already exists"
-                        )
-                    else:
-                        slug_incrementer += 1
-                        slug = f"{base_slug}-{str(slug_incrementer)}"
-                        data["slug"] = slug
+                    data["slug"] = slug
                 else:
                     raise CollectionNotCreatedError(str(e))
+        current_group_collections.slug_cache.set(slug, new_record["id"])
+        current_group_collections.response_cache.invalidate()
 
         # assign the configured administrative user as owner of the
         # new collection
         # if no account is configured, assign the first administrative user
         # NOTE: this allows the admin to manage the collection in the UI
         # is also ensures that the collection will be marked as "verified"
-        admin_email = app.config.get("GROUP_COLLECTIONS_ADMIN_EMAIL")
-        admin_by_email = accounts_datastore.get_user_by_email(admin_email)
-        admin_role = accounts_datastore.find_role("admin")
-        if admin_by_email:
-            admin_id = admin_by_email.id
-        else:
-            admin_role_holders = [u for u in admin_role.users]
-            assert len(admin_role_holders) > 0  # should be at least one admin
-            admin_id = admin_role_holders[0].id
-        member = current_communities.service.members.add(
-            system_identity,
-            new_record["id"],
-            data={
-                "members": [{"type": "user", "id": str(admin_id)}],
-                "role": "owner",
-            },
+        admin_id, admin_role_id = current_group_collections.owner_cache.get(
+            find_collection_owner
         )
-
-        # assign admin group as member of the new collection
-        try:
-            manage_payload = [{"type": "group", "id": admin_role.id}]
-            manage_members = current_communities.service.members.add(
-                system_identity,
-                new_record["id"],
-                data={"members": manage_payload, "role": "owner"},
-            )
-        except AlreadyMemberError:
-            app.logger.error("adminstrator role is already an owner")
+        members_by_role = {
+            "owner": [
+                {"type": "user", "id": str(admin_id)},
+                # assign admin group as member of the new collection
+                {"type": "group", "id": admin_role_id},
+            ]
+        }
 
         # assign the group roles as members of the new collection
         for coll_perm, remote_roles in invenio_roles.items():
-            for role in remote_roles:
-                try:
-                    role_id = accounts_datastore.find_role(role).id
-                except AttributeError:
-                    app.logger.error(f"Role {role} not found in accounts_datastore")
-                    continue
-
-                try:
-                    payload = [
-                        {
-                            "type": "group",
-                            "id": role_id,
-                        }
-                    ]
-                    member = current_communities.service.members.add(
-                        system_identity,
-                        new_record["id"],
-                        data={
-                            "members": payload,
-                            "role": coll_perm,
-                        },
-                    )
-                    assert member
-                except AlreadyMemberError:
-                    app.logger.error(f"{role} role was was already a group member")
-                except Exception as e:
-                    app.logger.error(f"Error adding {role} role to collection: {e}")
+            members_by_role.setdefault(coll_perm, []).extend(
+                {"type": "group", "id": role_ids[role]} for role in remote_roles
+            )
+        add_members_to_community(new_record["id"], members_by_role)
 
         # download the group avatar and upload it to the Invenio instance
         if commons_avatar_url and "mystery-group.png" not in commons_avatar_url:
-            self.update_avatar(commons_avatar_url, new_record["id"])
+            self.schedule_avatar_update(
+                commons_avatar_url, new_record["id"], commons_instance=commons_instance
+            )
 
         # current_communities.service.record_cls.index.refresh()
 
@@ -562,6 +1412,8 @@ class GroupCollectionsService(RecordService):
             deleted = current_communities.service.delete(
                 system_identity, collection_slug
             )
+            current_group_collections.slug_cache.delete(collection_slug)
+            current_group_collections.response_cache.invalidate()
             if deleted:
                 app.logger.info(
                     f"Collection {collection_slug} belonging to "
@@ -594,7 +1446,12 @@ class GroupCollectionsService(RecordService):
         collection_slug: str,
         remote_group_id: str,
         remote_instance_name: str,
-    ) -> CommunityItem:
+        progress: Callable[[int, int], None] | None = None,
+        refresh: bool = True,
+        processed: Iterable[tuple[str, str]] | None = None,
+        checkpoint: Callable[[list[tuple[str, str]]], None] | None = None,
+        plan: bool = False,
+    ) -> CommunityItem | dict:
         """Remove all connections between the remote group and the collection.
 
         This method will remove all role-based members of the collection that
@@ -617,61 +1474,96 @@ class GroupCollectionsService(RecordService):
             remote_group_id: The ID of the group on the remote Commons
             instance.
             remote_instance_name: The name of the remote Commons instance.
+            progress: An optional callback, called with the number of group
+                members reassigned so far and the total number to reassign.
+            refresh: Whether to make the change visible to search according
+                to ``GROUP_COLLECTIONS_INDEX_REFRESH``. Callers disowning
+                several collections can pass False and call
+                ``refresh_index`` once at the end.
+            processed: (community role, user id) pairs that were already
+                reassigned by an earlier, interrupted run. These users are
+                not added again.
+            checkpoint: An optional callback, called with the (community
+                role, user id) pairs reassigned by each call to the
+                members service, so that an interrupted run can be resumed.
+            plan: If True, nothing is changed. The changes that disowning
+                the collection would make are worked out with read-only
+                queries and returned instead (see ``_disown_plan``).
 
         Returns:
             A CommunityItem object representing the disowned collection. This
             should have no group-based members linked to the remote group, and
             the remote group's metadata should be removed from its
-            custom_fields.
+            custom_fields. In plan mode, a dictionary describing the planned
+            changes.
         """
         app.logger.info(
-            f"GroupCollectionsService: Disowning collection "
-            f"{collection_slug} from {remote_instance_name} "
+            f"GroupCollectionsService: {'Planning' if plan else 'Disowning'} "
+            f"collection {collection_slug} from {remote_instance_name} "
             f"group {remote_group_id}"
         )
-        model_class = current_communities.service.members.record_cls.model_cls
-        query = model_class.query.filter(
-            model_class.group_id.contains(f"{remote_instance_name}---{remote_group_id}")
+        memberships = find_group_memberships(
+            remote_instance_name, remote_group_id, community_id=collection_id
         )
-        group_members = [(g.group_id, g.role) for g in query.all()]
-        app.logger.info(f"Group members to remove: {group_members}")
-
-        individual_memberships = []
-        failures = []
-        for member_role in group_members:
-            app.logger.info(f"Group member to remove: {member_role}")
-            individuals = [
-                u for u in accounts_datastore.find_role(member_role[0]).users
-            ]
-            app.logger.info(f"Individuals: {pformat(individuals)}")
-
-            for member in individuals:
-                # assign member to the group collection community
-                # directly with a community role based on their former
-                # group role
-                add_result = add_user_to_community(
-                    member.id, member_role[1], int(collection_id)
+        group_role_ids = [g.group_id for g in memberships]
+        app.logger.info(f"Group members to remove: {group_role_ids}")
+
+        # assign the groups' users to the collection directly, with a
+        # community role based on their former group role
+        user_roles = find_group_member_users(collection_id, group_role_ids)
+        done_users = {str(user_id) for _, user_id in processed or []}
+        members_by_role = {}
+        for user_id, role in user_roles.items():
+            if user_id not in done_users:
+                members_by_role.setdefault(role, []).append(
+                    {"type": "user", "id": user_id}
                 )
-                if add_result:
-                    individual_memberships.append((member.id, member_role[1]))
-                    app.logger.info(f"Member {member.id} reassigned successfully.")
-                else:
-                    failures.append(member)
+        skipped = len(user_roles) - sum(len(m) for m in members_by_role.values())
 
-            members = current_communities.service.members.record_cls.get_members(
-                collection_id,
-                members=[{"type": "group", "id": member_role[0]}],
+        if plan:
+            return self._disown_plan(
+                collection_id, collection_slug, memberships, members_by_role
             )
-            app.logger.info(f"Members to remove: {pformat(members)}")
-            if members:
-                current_communities.service.members.delete(
-                    system_identity,
-                    collection_id,
-                    data={"members": [{"id": member_role[0], "type": "group"}]},
-                )
 
+        def report_progress(done: int, total: int) -> None:
+            if progress:
+                progress(skipped + done, skipped + total)
+
+        def report_added(role: str, members: list[dict]) -> None:
+            if checkpoint:
+                checkpoint([(role, m["id"]) for m in members])
+
+        added = add_members_to_community(
+            collection_id,
+            members_by_role,
+            chunk_size=app.config.get("GROUP_COLLECTIONS_MEMBER_CHUNK_SIZE", 100),
+            progress=report_progress,
+            on_added=report_added,
+        )
+        added_users = {m["id"] for members in added.values() for m in members}
+        failures = [
+            u for u in user_roles if u not in added_users and u not in done_users
+        ]
+        app.logger.info(
+            f"Reassigned {len(added_users)} members of collection {collection_slug}."
+        )
         if failures:
-            raise RuntimeError("Failed to reassign all members to the collection.")
+            raise RuntimeError(
+                f"Failed to reassign all members to the collection: {failures}"
+            )
+
+        step = member_batch_size()
+        for i in range(0, len(group_role_ids), step):
+            current_communities.service.members.delete(
+                system_identity,
+                collection_id,
+                data={
+                    "members": [
+                        {"id": group_role_id, "type": "group"}
+                        for group_role_id in group_role_ids[i : i + step]
+                    ]
+                },
+            )
 
         # remove the remote group's metadata from the collection
         collection_record = current_communities.service.read(
@@ -689,7 +1581,259 @@ class GroupCollectionsService(RecordService):
         new_record = current_communities.service.update(
             system_identity, collection_id, data=new_data
         )
+        current_group_collections.slug_cache.delete(collection_slug)
+        current_group_collections.response_cache.invalidate()
 
-        current_search_client.indices.refresh(index="*communities*")
+        if refresh:
+            self.refresh_index(new_record._record)
 
         return new_record
+
+    def _disown_plan(
+        self,
+        collection_id: str,
+        collection_slug: str,
+        memberships: list,
+        members_by_role: dict[str, list[dict]],
+    ) -> dict:
+        """Describe the changes that disowning a collection would make.
+
+        Lists are cut down to ``GROUP_COLLECTIONS_PLAN_SAMPLE_SIZE`` items.
+        The members service calls are counted with the same batch sizes
+        that a real disown uses. The number of index writes counts one
+        write for each member added or removed and one for the collection
+        itself.
+
+        params:
+            collection_id: The ID of the collection.
+            collection_slug: The slug of the collection.
+            memberships: The group memberships that would be removed.
+            members_by_role: The users that would be added, by community
+                role.
+
+        Returns:
+            A dictionary with the planned changes.
+        """
+        sample_size = app.config.get("GROUP_COLLECTIONS_PLAN_SAMPLE_SIZE", 20)
+        chunk_size = member_batch_size(
+            app.config.get("GROUP_COLLECTIONS_MEMBER_CHUNK_SIZE", 100)
+        )
+        users = [
+            {"user_id": m["id"], "role": role}
+            for role, members in members_by_role.items()
+            for m in members
+        ]
+        return {
+            "collection_id": str(collection_id),
+            "collection_slug": collection_slug,
+            "dropped_group_memberships": {
+                "count": len(memberships),
+                "sample": [
+                    {"group_id": m.group_id, "role": m.role}
+                    for m in memberships[:sample_size]
+                ],
+            },
+            "added_users": {
+                "count": len(users),
+                "by_role": {
+                    role: len(members) for role, members in members_by_role.items()
+                },
+                "sample": users[:sample_size],
+            },
+            "member_service_calls": sum(
+                math.ceil(len(members) / chunk_size)
+                for members in members_by_role.values()
+            )
+            + math.ceil(len(memberships) / member_batch_size()),
+            "index_writes": len(users) + len(memberships) + 1,
+            "index_refresh": app.config.get(
+                "GROUP_COLLECTIONS_INDEX_REFRESH", "records"
+            ),
+        }
+
+    def refresh_index(self, record=None) -> None:
+        """Make recent changes to collections visible to search.
+
+        Follows the ``GROUP_COLLECTIONS_INDEX_REFRESH`` policy:
+
+        - "none": nothing is done.
+        - "wait_for": the given record is indexed again with
+          ``refresh=wait_for``. Without a record (e.g. after several
+          collections were changed) this falls back to "records".
+        - "records": the communities record index alone is refreshed.
+
+        params:
+            record: The community record that was last changed.
+
+        Raises:
+            ValueError: If the configured policy is unknown.
+        """
+        policy = app.config.get("GROUP_COLLECTIONS_INDEX_REFRESH", "records")
+        if policy == "none":
+            return
+        elif policy == "wait_for" and record is not None:
+            current_communities.service.indexer.index(
+                record, arguments={"refresh": "wait_for"}
+            )
+        elif policy in ["wait_for", "records"]:
+            current_communities.service.record_cls.index.refresh()
+        else:
+            raise ValueError(f"Unknown index refresh policy: {policy}")
+
+    def submit_job(
+        self,
+        identity: Identity,
+        operation: str,
+        eager: bool = False,
+        key: str | None = None,
+        **params,
+    ) -> dict:
+        """Run a create, delete or disown operation in the background.
+
+        A job record is created in the job store and a Celery task is
+        queued to run the operation with the given keyword arguments. The
+        job's status, progress and result can then be looked up with
+        ``read_job``.
+
+        params:
+            identity: The identity of the user making the request.
+            operation: One of "create", "delete" or "disown".
+            eager: If True, the job is run in the current process instead
+                of a Celery task, and the finished job record is returned.
+                The job is still recorded, so a failed run can be resumed
+                with ``resume_job``.
+            key: An optional key identifying the work the job does (e.g.
+                disowning a particular collection). If an unfinished job
+                was submitted with the same key, that job is resumed from
+                its checkpoint (with its original parameters) instead of
+                a new one being created.
+            **params: Keyword arguments for the service method (excluding
+                the identity). They must be JSON serializable.
+
+        Raises:
+            ValueError: If the operation is not supported.
+            JobRunningError: If ``eager`` is True and the unfinished job
+                with the same key is being run by another worker.
+
+        Returns:
+            The job record.
+        """
+        if operation not in self.job_operations:
+            raise ValueError(f"Unsupported job operation {operation}")
+        job_store = current_group_collections.job_store
+        job = job_store.get_by_key(key) if key is not None else None
+        if job is not None and job["status"] != "succeeded":
+            if eager:
+                self.run_job(job["id"], job["operation"], job["params"])
+                return job_store.get(job["id"])
+            return self.resume_job(identity, job["id"])
+        job = job_store.create(operation, params, key=key)
+        if eager:
+            self.run_job(job["id"], operation, params)
+            return job_store.get(job["id"])
+        run_collection_job.delay(job["id"], operation, params)
+        return job
+
+    def resume_job(self, identity: Identity, job_id: str) -> dict:
+        """Queue a failed or stale job to run again.
+
+        A job is only queued again if it has failed, or if it is pending or
+        running but its record has not been updated for
+        ``GROUP_COLLECTIONS_JOB_LEASE`` seconds (so the worker running it
+        is presumed dead). Jobs that have succeeded, or that a live worker
+        is running, are returned unchanged.
+
+        Disown jobs pick up from their last checkpoint, so members that
+        were already reassigned are not processed again. Members added in
+        a batch that was interrupted before it was checkpointed are looked
+        up again, and ``find_group_member_users`` leaves out users who are
+        already direct members of the collection, so they are not added
+        twice.
+
+        params:
+            identity: The identity of the user making the request.
+            job_id: The id of the job.
+
+        Raises:
+            NotFound: If there is no job with the given id.
+
+        Returns:
+            The job record.
+        """
+        job = self.read_job(identity, job_id)
+        if current_group_collections.job_store.is_resumable(job):
+            run_collection_job.delay(job["id"], job["operation"], job["params"])
+        return job
+
+    def run_job(self, job_id: str, operation: str, params: dict) -> None:
+        """Run a job submitted with ``submit_job`` and record its outcome.
+
+        This is called by the ``run_collection_job`` Celery task. The job
+        is only run if it can be claimed (see ``CollectionJobStore.claim``).
+        Running a job that has already succeeded does nothing. Disown jobs
+        record the (community role, user id) pairs they have reassigned as
+        a checkpoint in the job record, and skip them when the job is run
+        again.
+
+        Raises:
+            JobRunningError: If the job is running and its lease has not
+                expired. The Celery task retries until the job finishes or
+                its lease expires.
+        """
+        job_store = current_group_collections.job_store
+        job = job_store.claim(job_id)
+        if job is None:
+            return
+        processed = [tuple(p) for p in job.get("checkpoint") or []]
+
+        def record_progress(done: int, total: int) -> None:
+            job_store.update(job_id, progress={"done": done, "total": total})
+
+        def record_checkpoint(pairs: list[tuple[str, str]]) -> None:
+            job_store.append_checkpoint(job_id, [list(p) for p in pairs])
+
+        try:
+            if operation == "create":
+                collection = self.create(system_identity, **params)
+            elif operation == "delete":
+                collection = self.delete(system_identity, **params)
+            elif operation == "disown":
+                collection = self.disown(
+                    system_identity,
+                    progress=record_progress,
+                    processed=list(processed),
+                    checkpoint=record_checkpoint,
+                    **params,
+                )
+            else:
+                raise ValueError(f"Unsupported job operation {operation}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Collection job {job_id} ({operation}) failed: {e}")
+            job_store.update(
+                job_id,
+                status="failed",
+                error={"type": type(e).__name__, "message": str(e)},
+            )
+            return
+
+        job_store.update(
+            job_id,
+            status="succeeded",
+            result={
+                "collection": collection.data["slug"],
+                "collection_id": collection.data["id"],
+            },
+        )
+
+    def read_job(self, identity: Identity, job_id: str) -> dict:
+        """Return the record of a background job.
+
+        Raises:
+            NotFound: If there is no job with the given id (or it has
+                expired).
+        """
+        job = current_group_collections.job_store.get(job_id)
+        if job is None:
+            raise NotFound(f"No job found with the id {job_id}")
+        return job
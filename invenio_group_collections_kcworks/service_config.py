@@ -8,6 +8,8 @@
 
 """Configuration class and helper classes for the groups_metadata service."""
 
+from flask import current_app
+from invenio_communities.proxies import current_communities
 from invenio_records_permissions.generators import (
     AnyUser,
     AuthenticatedUser,
@@ -20,6 +22,10 @@ from invenio_records_resources.services.base.config import (
 from invenio_records_resources.services.records.config import (
     RecordServiceConfig,
 )
+from invenio_records_resources.services.records.params import ParamInterpreter
+from invenio_search.engine import dsl
+from invenio_search.proxies import current_search_client
+from invenio_search.utils import prefix_index
 
 
 class GroupCollectionsPermissionPolicy(BasePermissionPolicy):
@@ -35,3 +41,59 @@ class GroupCollectionsServiceConfig(RecordServiceConfig, ConfiguratorMixin):
     """Community collections service configuration."""
 
     service_id = "group_collections"
+
+
+_mapped_fields: dict[tuple[str, str], bool] = {}
+
+
+def field_is_mapped(field: str) -> bool:
+    """Return whether a field exists in the communities index mapping.
+
+    The answer is kept for the life of the process, so a process that was
+    running before a mapping change must be restarted to pick it up.
+    """
+    index = prefix_index(current_communities.service.record_cls.index.search_alias)
+    if (index, field) not in _mapped_fields:
+        response = current_search_client.indices.get_field_mapping(
+            index=index, fields=field
+        )
+        _mapped_fields[(index, field)] = any(
+            m.get("mappings") for m in response.values()
+        )
+    return _mapped_fields[(index, field)]
+
+
+class GroupCollectionsFilterParam(ParamInterpreter):
+    """Restrict a communities search to Commons group collections.
+
+    Always filters for communities that have a Commons instance. If the
+    ``commons_instance`` or ``commons_group_id`` params are set, adds an
+    exact-match filter for each of them. The filters are applied in filter
+    context as keyword ``term``/``exists`` queries, so they are not scored,
+    can be cached by OpenSearch, and treat the param values literally
+    rather than as query string syntax.
+
+    The indexed field for each param is set by
+    ``GROUP_COLLECTIONS_SEARCH_FILTER_FIELDS``. If that field is missing
+    from the index mapping (e.g. because the custom field was declared
+    without ``use_as_filter=True``, or the index has not been rebuilt
+    since), the matching ``GROUP_COLLECTIONS_SEARCH_FALLBACK_FIELDS`` text
+    field is filtered with a ``match_phrase`` query instead.
+    """
+
+    def apply(self, identity, search, params):
+        """Apply the filters to the search."""
+        config = current_app.config
+        filters = []
+        for param in ["commons_instance", "commons_group_id"]:
+            field = config["GROUP_COLLECTIONS_SEARCH_FILTER_FIELDS"][param]
+            if field_is_mapped(field):
+                query = "term"
+            else:
+                field = config["GROUP_COLLECTIONS_SEARCH_FALLBACK_FIELDS"][param]
+                query = "match_phrase"
+            if param == "commons_instance":
+                filters.append(dsl.Q("exists", field=field))
+            if params.get(param):
+                filters.append(dsl.Q(query, **{field: params[param]}))
+        return search.filter(dsl.Q("bool", filter=filters))
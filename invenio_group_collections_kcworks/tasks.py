@@ -0,0 +1,71 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Celery tasks for invenio-group-collections-kcworks."""
+
+from celery import shared_task
+from flask import current_app
+
+from .errors import AvatarNotFetchedError, JobRunningError
+from .proxies import current_group_collections, current_group_collections_service
+
+
+@shared_task(bind=True, ignore_result=True)
+def update_collection_avatar(
+    self,
+    commons_avatar_url: str,
+    community_record_id: str,
+    commons_instance: str | None = None,
+) -> bool:
+    """Download a group avatar and upload it as the collection logo.
+
+    Transient failures are retried with exponential backoff, up to
+    ``GROUP_COLLECTIONS_AVATAR_TASK_MAX_RETRIES`` times.
+    """
+    try:
+        return current_group_collections_service.update_avatar(
+            commons_avatar_url,
+            community_record_id,
+            commons_instance=commons_instance,
+            raise_errors=True,
+        )
+    except AvatarNotFetchedError as e:
+        backoff = current_app.config.get("GROUP_COLLECTIONS_AVATAR_TASK_BACKOFF", 30)
+        raise self.retry(
+            exc=e,
+            countdown=min(backoff * 2**self.request.retries, 3600),
+            max_retries=current_app.config.get(
+                "GROUP_COLLECTIONS_AVATAR_TASK_MAX_RETRIES", 5
+            ),
+        )
+
+
+@shared_task(
+    bind=True, ignore_result=True, acks_late=True, reject_on_worker_lost=True
+)
+def run_collection_job(self, job_id: str, operation: str, params: dict) -> None:
+    """Run a collection create, delete or disown job in the background.
+
+    The job's status, progress and result are recorded in the job store.
+    The task is only acknowledged once it has finished, so a job whose
+    worker crashes is delivered again. If the job is still marked as
+    running at that point, the task is retried once the job's lease
+    (``GROUP_COLLECTIONS_JOB_LEASE``) has expired, and then resumes the job
+    from its checkpoint. If the job finishes in the meantime (because its
+    worker was alive after all), the retry does nothing.
+    """
+    try:
+        current_group_collections_service.run_job(job_id, operation, params)
+    except JobRunningError as e:
+        job_store = current_group_collections.job_store
+        job = job_store.get(job_id)
+        raise self.retry(
+            exc=e,
+            countdown=job_store.lease_remaining(job) if job else 1,
+            max_retries=None,
+        )
@@ -8,16 +8,40 @@
 
 """Utility functions for invenio-group-collections-kcworks."""
 
+import base64
+import binascii
+import json
 import re
+from collections.abc import Callable
+from io import BytesIO
 from urllib.parse import quote
 
 from flask import current_app
 from invenio_access.permissions import system_identity
+from invenio_accounts.models import Role, User, userrole
+from invenio_accounts.proxies import current_datastore as accounts_datastore
+from invenio_communities.communities.records.systemfields.deletion_status import (
+    CommunityDeletionStatusEnum,
+)
 from invenio_communities.members.errors import AlreadyMemberError
 from invenio_communities.members.records.api import Member
 from invenio_communities.proxies import current_communities
+from invenio_db import db
+from invenio_search.engine import dsl
+from invenio_users_resources.proxies import current_groups_service
+from marshmallow import ValidationError
+from PIL import Image
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from unidecode import unidecode
 
+from .errors import CollectionAlreadyExistsError
+
+MEMBERS_SERVICE_BATCH_LIMIT = 100
+"""Maximum number of members the communities members service accepts in
+one call (see ``invenio_communities.members.services.schemas.MembersSchema``).
+"""
+
 
 def map_remote_roles_to_permissions(
     slug: str,
@@ -168,7 +192,7 @@ def make_group_slug(
         if incrementer > 0:
             fresh_slug = f"{base_slug}-{incrementer}"
         community_list = current_communities.service.search(
-            identity=system_identity, q=f"slug:{fresh_slug}"
+            identity=system_identity, extra_filter=dsl.Q("term", slug=fresh_slug)
         )
         if community_list.total == 0:
             break
@@ -193,6 +217,131 @@ def make_group_slug(
     return {"fresh_slug": fresh_slug, "deleted_slugs": deleted_slugs}
 
 
+def allocate_group_slug(
+    base_slug: str,
+    commons_instance: str,
+    commons_group_id: str,
+    restore_deleted: bool = False,
+    exclude: set[str] | None = None,
+) -> str:
+    """Pick the first free slug for a new group collection.
+
+    The slugs of all existing communities (including deleted ones) that
+    are ``base_slug`` or ``base_slug-<n>`` are loaded with a single
+    query, along with only the group fields of their metadata, and the
+    first free slug in the sequence ``base_slug``, ``base_slug-1``,
+    ``base_slug-2``... is chosen locally.
+
+    Args:
+        base_slug: The slug based on the group name.
+        commons_instance: The name of the Commons instance.
+        commons_group_id: The ID of the group on the Commons instance.
+        restore_deleted: Whether a deleted collection belonging to the
+            same group should be restored rather than skipped.
+        exclude: Slugs to treat as taken even if they are not found in
+            the database (e.g. because a concurrent create has claimed
+            them but not yet committed).
+
+    Raises:
+        CollectionAlreadyExistsError: If an active collection with one of
+            these slugs already belongs to the group.
+        NotImplementedError: If ``restore_deleted`` is True and a deleted
+            collection belonging to the group is found.
+
+    Returns:
+        The slug to use for the new collection.
+    """
+    model = current_communities.service.record_cls.model_cls
+    escaped = re.sub(r"([\\%_])", r"\\\1", base_slug)
+    rows = (
+        db.session.query(
+            model.slug,
+            model.json[("custom_fields", "kcr:commons_instance")]
+            .as_string()
+            .label("commons_instance"),
+            model.json[("custom_fields", "kcr:commons_group_id")]
+            .as_string()
+            .label("commons_group_id"),
+            model.deletion_status,
+            model.is_deleted,
+        )
+        .filter(
+            or_(
+                model.slug == base_slug,
+                # the prefix match can use the slug index, the regular
+                # expression drops slugs that are not ``base_slug-<n>``
+                and_(
+                    model.slug.like(f"{escaped}-%", escape="\\"),
+                    model.slug.op("~")(f"^{re.escape(base_slug)}-[0-9]+$"),
+                ),
+            )
+        )
+        .all()
+    )
+
+    instance_name = (
+        current_app.config.get("SSO_SAML_IDPS", {})
+        .get(commons_instance, {})
+        .get("title", commons_instance)
+    )
+    taken = set(exclude or [])
+    for row in rows:
+        taken.add(row.slug)
+        if row.commons_instance != commons_instance or row.commons_group_id != str(
+            commons_group_id
+        ):
+            continue
+        is_deleted = (
+            row.is_deleted
+            or row.deletion_status != CommunityDeletionStatusEnum.PUBLISHED
+        )
+        if not is_deleted:
+            raise CollectionAlreadyExistsError(
+                f"Collection for {instance_name} "
+                f"group {commons_group_id} already exists"
+            )
+        current_app.logger.error(
+            f"Collection for {instance_name} group {commons_group_id} "
+            f"seems to have been deleted previously ({row.slug}) and has not "
+            "been restored. Continuing with a new url slug."
+        )
+        if restore_deleted:
+            raise NotImplementedError("Restore deleted collection not yet implemented")
+
+    slug = base_slug
+    incrementer = 0
+    while slug in taken:
+        incrementer += 1
+        slug = f"{base_slug}-{incrementer}"
+    return slug
+
+
+def find_collection_id_by_slug(slug: str) -> str | None:
+    """Look up the id of a published community by its slug.
+
+    Uses the unique slug column of the communities table, so the result
+    does not depend on the search index being refreshed.
+
+    Args:
+        slug: The slug of the community.
+
+    Returns:
+        The community id as a string, or None if there is no published
+        community with that slug.
+    """
+    model = current_communities.service.record_cls.model_cls
+    row = (
+        db.session.query(model.id)
+        .filter(
+            model.slug == slug,
+            model.deletion_status == CommunityDeletionStatusEnum.PUBLISHED,
+            model.is_deleted.isnot(True),
+        )
+        .one_or_none()
+    )
+    return str(row.id) if row else None
+
+
 def add_user_to_community(
     user_id: int, role: str, community_id: int
 ) -> Member | None:
@@ -216,3 +365,413 @@ def add_user_to_community(
             f"Error adding user {user_id} to community {community_id}"
         )
     return members
+
+
+def find_collection_owner() -> tuple[int, str]:
+    """Find the user and role that should own new group collections.
+
+    The owner is the user configured in ``GROUP_COLLECTIONS_ADMIN_EMAIL``.
+    If no account has that email, the holder of the ``admin`` role with
+    the lowest id is used instead.
+
+    Returns:
+        A tuple of the owner user's id and the ``admin`` role's id.
+    """
+    admin_email = current_app.config.get("GROUP_COLLECTIONS_ADMIN_EMAIL")
+    admin_by_email = accounts_datastore.get_user_by_email(admin_email)
+    admin_role = accounts_datastore.find_role("admin")
+    if admin_by_email:
+        admin_id = admin_by_email.id
+    else:
+        admin_id = (
+            db.session.query(User.id)
+            .join(userrole, userrole.c.user_id == User.id)
+            .filter(userrole.c.role_id == admin_role.id)
+            .order_by(User.id)
+            .limit(1)
+            .scalar()
+        )
+        assert admin_id is not None  # should be at least one admin
+    return admin_id, admin_role.id
+
+
+def bulk_find_or_create_roles(role_names: list[str]) -> dict[str, str]:
+    """Find or create a set of roles in a single transaction.
+
+    Existing roles are resolved with one ``SELECT ... WHERE name IN``
+    query. The missing ones are inserted with a single
+    ``INSERT ... ON CONFLICT DO NOTHING``, so that roles created
+    concurrently by another process are tolerated, and the session is
+    committed once. New roles are given their name as their id.
+
+    Args:
+        role_names: The names of the roles to find or create.
+
+    Returns:
+        A dictionary mapping each role name to its role id.
+    """
+    names = list(dict.fromkeys(role_names))
+    if not names:
+        return {}
+    role_ids = dict(
+        db.session.query(Role.name, Role.id).filter(Role.name.in_(names)).all()
+    )
+
+    missing = [n for n in names if n not in role_ids]
+    inserted = {}
+    if missing:
+        table = Role.__table__
+        # group roles use their name as their id, like managed roles
+        # created through the ORM
+        rows = [{"id": n, "name": n, "is_managed": True} for n in missing]
+        if "version_id" in table.c:
+            rows = [{**r, "version_id": 1} for r in rows]
+        stmt = (
+            pg_insert(table)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(table.c.name, table.c.id)
+        )
+        inserted = dict(db.session.execute(stmt).all())
+        role_ids.update(inserted)
+
+        # roles inserted by a concurrent transaction are not returned
+        conflicted = [n for n in missing if n not in role_ids]
+        if conflicted:
+            role_ids.update(
+                db.session.query(Role.name, Role.id)
+                .filter(Role.name.in_(conflicted))
+                .all()
+            )
+    db.session.commit()
+
+    if inserted:
+        # the core insert bypasses the ORM hooks that index new groups
+        current_groups_service.indexer.bulk_index(list(inserted.values()))
+
+    return role_ids
+
+
+def member_batch_size(chunk_size: int | None = None) -> int:
+    """Return the number of members to send in one members service call.
+
+    Args:
+        chunk_size: The configured chunk size, if any.
+
+    Returns:
+        The chunk size, clamped to ``MEMBERS_SERVICE_BATCH_LIMIT``.
+    """
+    if not chunk_size or chunk_size > MEMBERS_SERVICE_BATCH_LIMIT:
+        return MEMBERS_SERVICE_BATCH_LIMIT
+    return chunk_size
+
+
+def add_members_to_community(
+    community_id: str | int,
+    members_by_role: dict[str, list[dict]],
+    chunk_size: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    on_added: Callable[[str, list[dict]], None] | None = None,
+) -> dict[str, list[dict]]:
+    """Add members to a community with one request per role level.
+
+    Each community role level's members are sent in as few ``members.add``
+    calls as the members service allows (at most
+    ``MEMBERS_SERVICE_BATCH_LIMIT`` members per call), so that the number
+    of service calls (and their validation, database writes and
+    reindexing) grows as slowly as possible with the number of members. A
+    member listed under more than one role level is only added at the
+    highest of them.
+
+    If a batch is rejected (e.g. because one of its members already
+    belongs to the community), a warning is logged and its members are
+    added one at a time instead so that the others are still added.
+    Validation errors are raised, since retrying the members one at a time
+    would not fix them.
+
+    Args:
+        community_id: The id of the community.
+        members_by_role: A dictionary whose keys are community role names
+            and whose values are lists of member payloads (e.g.
+            ``{"type": "group", "id": role_id}``).
+        chunk_size: If given, each role level's members are added in
+            ``members.add`` calls of at most this many members. It is
+            clamped to ``MEMBERS_SERVICE_BATCH_LIMIT``, which is also the
+            default.
+        progress: An optional callback, called after each call with the
+            number of members processed so far and the total number of
+            members.
+        on_added: An optional callback, called after each call with the
+            role level and the members that were added by it. It can be
+            used to checkpoint long-running additions.
+
+    Returns:
+        A dictionary with the same shape as ``members_by_role`` holding
+        the members that were added.
+    """
+    role_order = [r["name"] for r in current_app.config["COMMUNITIES_ROLES"]]
+    ordered_roles = sorted(
+        members_by_role.keys(),
+        key=lambda r: role_order.index(r) if r in role_order else len(role_order),
+    )
+    seen = set()
+    batches = {}
+    for role in ordered_roles:
+        for member in members_by_role[role]:
+            key = (member["type"], str(member["id"]))
+            if key not in seen:
+                seen.add(key)
+                batches.setdefault(role, []).append(member)
+
+    chunks = []
+    for role, members in batches.items():
+        step = member_batch_size(chunk_size)
+        chunks.extend(
+            (role, members[i : i + step]) for i in range(0, len(members), step)
+        )
+    total = sum(len(members) for members in batches.values())
+    done = 0
+
+    added = {}
+    for role, members in chunks:
+        chunk_added = []
+        try:
+            current_communities.service.members.add(
+                system_identity,
+                community_id,
+                data={"members": members, "role": role},
+            )
+            chunk_added = members
+        except ValidationError:
+            raise
+        except Exception as e:
+            current_app.logger.warning(
+                f"Could not add {role} members to community {community_id} "
+                f"in one batch ({e!r}). Adding them individually."
+            )
+            for member in members:
+                try:
+                    current_communities.service.members.add(
+                        system_identity,
+                        community_id,
+                        data={"members": [member], "role": role},
+                    )
+                    chunk_added.append(member)
+                except AlreadyMemberError:
+                    current_app.logger.error(
+                        f"{member['type']} {member['id']} was already a "
+                        f"member of community {community_id}"
+                    )
+                except Exception as e:
+                    current_app.logger.error(
+                        f"Error adding {member['type']} {member['id']} to "
+                        f"community {community_id}: {e}"
+                    )
+        if chunk_added:
+            added.setdefault(role, []).extend(chunk_added)
+            if on_added:
+                on_added(role, chunk_added)
+        done += len(members)
+        if progress:
+            progress(done, total)
+    return added
+
+
+def find_group_member_users(
+    community_id: str, group_role_ids: list[str]
+) -> dict[str, str]:
+    """Find the users who belong to a community through group roles.
+
+    Uses a single query joining the community's group memberships to the
+    users holding each group's role. Users who are already direct
+    members of the community (including through a pending invitation)
+    are left out.
+
+    Args:
+        community_id: The id of the community.
+        group_role_ids: The ids of the group roles whose users should be
+            found.
+
+    Returns:
+        A dictionary mapping each user id (as a string) to the community
+        role of the group membership through which the user belongs to
+        the community. A user reached through several groups is mapped
+        to the highest of their roles.
+    """
+    if not group_role_ids:
+        return {}
+    member_model = current_communities.service.members.record_cls.model_cls
+    rows = (
+        db.session.query(userrole.c.user_id, member_model.role)
+        .join(member_model, member_model.group_id == userrole.c.role_id)
+        .filter(
+            member_model.community_id == community_id,
+            member_model.group_id.in_(group_role_ids),
+        )
+        .all()
+    )
+    direct_members = {
+        str(user_id)
+        for (user_id,) in db.session.query(member_model.user_id).filter(
+            member_model.community_id == community_id,
+            member_model.user_id.isnot(None),
+        )
+    }
+
+    role_order = [r["name"] for r in current_app.config["COMMUNITIES_ROLES"]]
+
+    def rank(role: str) -> int:
+        return role_order.index(role) if role in role_order else len(role_order)
+
+    user_roles = {}
+    for user_id, role in rows:
+        user_id = str(user_id)
+        if user_id in direct_members:
+            continue
+        if user_id not in user_roles or rank(role) < rank(user_roles[user_id]):
+            user_roles[user_id] = role
+    return user_roles
+
+
+def find_group_memberships(
+    commons_instance: str, commons_group_id: str, community_id: str | None = None
+) -> list:
+    """Find the community memberships held by a remote group's roles.
+
+    Group roles are named ``{commons_instance}---{commons_group_id}|{role}``
+    (see ``format_group_role_name``), so the group's roles are found
+    with an anchored ``LIKE 'prefix|%'`` match on the role name. Unlike a
+    substring match, this can use the ``varchar_pattern_ops`` index on
+    ``accounts_role.name`` and does not confuse group "1" with group
+    "12".
+
+    Args:
+        commons_instance: The name of the remote Commons instance.
+        commons_group_id: The ID of the group on the remote Commons
+            instance.
+        community_id: The id of a community to limit the search to. If
+            omitted, the group's memberships in all communities are found.
+
+    Returns:
+        A list of community member model objects.
+    """
+    member_model = current_communities.service.members.record_cls.model_cls
+    prefix = f"{commons_instance}---{commons_group_id}|"
+    escaped = re.sub(r"([\\%_])", r"\\\1", prefix)
+    query = member_model.query.join(Role, Role.id == member_model.group_id).filter(
+        Role.name.like(f"{escaped}%", escape="\\")
+    )
+    if community_id is not None:
+        query = query.filter(member_model.community_id == community_id)
+    return query.all()
+
+
+def normalize_avatar(avatar: bytes) -> bytes:
+    """Downscale and re-encode a group avatar for use as a collection logo.
+
+    The image is shrunk (never enlarged) to fit within
+    ``GROUP_COLLECTIONS_AVATAR_MAX_DIMENSIONS`` and re-encoded in
+    ``GROUP_COLLECTIONS_AVATAR_FORMAT`` (WEBP by default, or an optimised
+    PNG). Images whose header reports more than
+    ``GROUP_COLLECTIONS_AVATAR_MAX_PIXELS`` pixels are refused before any
+    pixel data is decoded, and JPEGs are decoded directly at a reduced
+    scale where possible, so that memory use stays bounded. Images over
+    Pillow's ``Image.MAX_IMAGE_PIXELS``, which it treats as possible
+    decompression bombs, are refused in the same way.
+
+    If the re-encoded image would be larger than an original that already
+    fits the maximum dimensions, the original is returned unchanged.
+
+    Args:
+        avatar: The avatar image bytes.
+
+    Raises:
+        PIL.UnidentifiedImageError: If the bytes are not a supported image.
+        ValueError: If the image has too many pixels.
+
+    Returns:
+        The normalised image bytes.
+    """
+    max_size = tuple(current_app.config["GROUP_COLLECTIONS_AVATAR_MAX_DIMENSIONS"])
+    max_pixels = current_app.config["GROUP_COLLECTIONS_AVATAR_MAX_PIXELS"]
+    image_format = current_app.config["GROUP_COLLECTIONS_AVATAR_FORMAT"].upper()
+
+    try:
+        image = Image.open(BytesIO(avatar))
+    except Image.DecompressionBombError as e:
+        raise ValueError(f"Avatar refused as a decompression bomb: {e}") from e
+
+    with image:
+        width, height = image.size
+        # Pillow only raises for images over twice its own limit and warns
+        # about the rest, so anything over its limit is refused here
+        limit = min(max_pixels, Image.MAX_IMAGE_PIXELS or max_pixels)
+        if width * height > limit:
+            raise ValueError(
+                f"Avatar has {width}x{height} pixels, more than the "
+                f"{limit} allowed"
+            )
+        resized = width > max_size[0] or height > max_size[1]
+        # decode JPEGs at the smallest scale that still covers max_size
+        image.draft("RGB", max_size)
+        image.thumbnail(max_size)
+
+        has_alpha = image.mode in ["RGBA", "LA", "PA"] or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        output = BytesIO()
+        if image_format == "PNG":
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.save(
+                output,
+                format=image_format,
+                quality=current_app.config["GROUP_COLLECTIONS_AVATAR_QUALITY"],
+                method=6,
+            )
+
+    normalized = output.getvalue()
+    if not resized and len(normalized) >= len(avatar):
+        return avatar
+    return normalized
+
+
+def encode_search_cursor(sort: str, search_after: list) -> str:
+    """Encode the sort values of the last hit on a page as an opaque cursor.
+
+    Args:
+        sort: The name of the sort option used for the search.
+        search_after: The sort values of the last hit on the page.
+
+    Returns:
+        A url-safe cursor string.
+    """
+    payload = json.dumps({"sort": sort, "after": list(search_after)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_search_cursor(cursor: str, sort: str) -> list:
+    """Decode a cursor made by ``encode_search_cursor``.
+
+    Args:
+        cursor: The cursor string.
+        sort: The name of the sort option used for the current search.
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for a
+            different sort option.
+
+    Returns:
+        The ``search_after`` values stored in the cursor.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        search_after = payload["after"]
+        cursor_sort = payload["sort"]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(search_after, list):
+        raise ValueError(f"Cursor was not made for the sort order {sort}")
+    return search_after
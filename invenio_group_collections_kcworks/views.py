@@ -8,11 +8,19 @@
 
 """Views for Commons group collections API endpoints."""
 
+import hashlib
+import json
+from urllib.parse import urlencode
+
 import marshmallow as ma
 import requests
 from flask import current_app as app
 from flask import (
+    Response,
     jsonify,
+    request,
+    stream_with_context,
+    url_for,
 )
 from flask_resources import (
     JSONDeserializer,
@@ -42,7 +50,7 @@ from .errors import (
     CollectionNotFoundError,
     CommonsGroupNotFoundError,
 )
-from .proxies import current_group_collections_service
+from .proxies import current_group_collections, current_group_collections_service
 
 
 class GroupCollectionsResourceConfig(ResourceConfig):
@@ -132,6 +140,7 @@ class GroupCollectionsResource(Resource):
     request_parsed_view_args = request_parser(
         {
             "slug": ma.fields.String(),
+            "job_id": ma.fields.String(),
         },
         location="view_args",
     )
@@ -142,6 +151,8 @@ class GroupCollectionsResource(Resource):
             "commons_group_id": ma.fields.String(),
             "collection": ma.fields.String(),
             "page": ma.fields.Integer(load_default=1),
+            "cursor": ma.fields.String(),
+            "fields": ma.fields.String(),
             "size": ma.fields.Integer(
                 validate=ma.validate.Range(min=4, max=1000), load_default=25
             ),
@@ -157,6 +168,7 @@ class GroupCollectionsResource(Resource):
                 load_default="updated-desc",
             ),
             "restore_deleted": ma.fields.Boolean(load_default=False),
+            "run_async": ma.fields.Boolean(data_key="async", load_default=False),
         },
         location="args",
     )
@@ -166,6 +178,11 @@ class GroupCollectionsResource(Resource):
         return [
             route("POST", "/", self.create),
             route("GET", "/", self.search),
+            route("GET", "/_export", self.export),
+            route("POST", "/_batch_read", self.batch_read),
+            route("POST", "/_bulk", self.bulk_create),
+            route("GET", "/_jobs/<job_id>", self.read_job),
+            route("POST", "/_jobs/<job_id>/resume", self.resume_job),
             route("GET", "/<slug>", self.read),
             route("DELETE", "/", self.failed_delete),
             route("DELETE", "/<slug>", self.delete),
@@ -179,35 +196,192 @@ class GroupCollectionsResource(Resource):
             "this endpoint. Use the main `communities` API endpoint instead."
         )
 
+    def _requested_fields(self) -> list[str] | None:
+        """Return the field names given in the ``fields`` query parameter."""
+        fields = resource_requestctx.args.get("fields")
+        if not fields:
+            return None
+        return [f.strip() for f in fields.split(",") if f.strip()]
+
+    def _conditional_json_response(self, read_versions, build_response):
+        """Return a JSON response with an ETag, honouring If-None-Match.
+
+        The ETag is a hash of the request path and query args and of the
+        id and revision id of each collection in the response.
+
+        If the shared response cache is enabled and holds an entry for
+        this request, its ETag and body are used. Otherwise, if the
+        request has an ``If-None-Match`` header, ``read_versions`` looks
+        up the versions with the same query as the response but without
+        loading the collections, and an empty 304 response is returned if
+        the ETag matches. Otherwise ``build_response`` runs the read or
+        search and returns the versions of the collections it fetched and
+        the response data, which is serialized once.
+        """
+        response_cache = current_group_collections.response_cache
+        query_string = urlencode(sorted(request.args.items(multi=True)))
+        cache_key = f"{request.path}?{query_string}"
+
+        def make_etag(versions: list[list]) -> str:
+            return hashlib.sha256(
+                json.dumps([cache_key, versions]).encode("utf-8")
+            ).hexdigest()
+
+        cached = response_cache.get(cache_key)
+        if cached:
+            etag = cached["etag"]
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = app.response_class(
+                    cached["body"], mimetype="application/json"
+                )
+            response.set_etag(etag)
+            return response
+
+        if request.if_none_match:
+            etag = make_etag(read_versions())
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+        versions, response_data = build_response()
+        etag = make_etag(versions)
+        response = jsonify(response_data)
+        response_cache.set(cache_key, response.get_data(as_text=True), etag)
+        response.set_etag(etag)
+        return response
+
+    @request_parsed_args
     @request_parsed_view_args
     def read(self):
         collection_slug = resource_requestctx.view_args.get("slug")
-        if collection_slug:
-            collection = current_group_collections_service.read(
-                system_identity, collection_slug
-            )
-            return jsonify(collection), 200
-        else:
+        if not collection_slug:
             raise BadRequest("No collection slug provided")
+        fields = self._requested_fields()
+
+        def build_response() -> tuple[list[list], dict]:
+            result = current_group_collections_service.read_result(
+                system_identity, collection_slug, fields=fields
+            )
+            versions = current_group_collections_service.result_versions(result)
+            return versions, next(result.hits) if fields else result.to_dict()
+
+        return self._conditional_json_response(
+            lambda: current_group_collections_service.collection_versions(
+                system_identity, slug=collection_slug, fields=fields
+            ),
+            build_response,
+        )
 
     @request_parsed_args
     def search(self):
+        return self._conditional_json_response(
+            self._search_versions, self._search_response
+        )
+
+    def _search_versions(self) -> list[list]:
+        """Look up the versions of the collections the search would return."""
+        args = resource_requestctx.args
+        return current_group_collections_service.collection_versions(
+            system_identity,
+            commons_instance=args.get("commons_instance"),
+            commons_group_id=args.get("commons_group_id"),
+            sort=args.get("sort", "updated-desc"),
+            size=args.get("size"),
+            page=args.get("page"),
+            cursor=args.get("cursor"),
+            fields=self._requested_fields(),
+        )
+
+    def _search_response(self) -> tuple[list[list], dict]:
+        """Run the search described by the request args and serialize it.
+
+        Returns:
+            A tuple of the versions of the collections found and the
+            response data.
+        """
         commons_instance = resource_requestctx.args.get("commons_instance")
         commons_group_id = resource_requestctx.args.get("commons_group_id")
         page = resource_requestctx.args.get("page")
         size = resource_requestctx.args.get("size")
         sort = resource_requestctx.args.get("sort", "updated-desc")
+        cursor = resource_requestctx.args.get("cursor")
+        fields = self._requested_fields()
+
+        if cursor is not None:
+            results, next_cursor = current_group_collections_service.search_after(
+                system_identity,
+                commons_instance,
+                commons_group_id,
+                sort=sort,
+                size=size,
+                cursor=cursor,
+                fields=fields,
+            )
+            response_data = results.to_dict()
+            response_data["next"] = next_cursor
+        else:
+            results = current_group_collections_service.search(
+                system_identity,
+                commons_instance,
+                commons_group_id,
+                sort=sort,
+                size=size,
+                page=page,
+                fields=fields,
+            )
+            response_data = results.to_dict()
 
-        results = current_group_collections_service.search(
-            system_identity,
-            commons_instance,
-            commons_group_id,
-            sort=sort,
-            size=size,
-            page=page,
+        versions = current_group_collections_service.result_versions(results)
+        return versions, response_data
+
+    @request_parsed_args
+    @request_data
+    def batch_read(self):
+        """Read several collections by their slugs."""
+        slugs = (resource_requestctx.data or {}).get("slugs")
+        if not isinstance(slugs, list) or not all(
+            isinstance(slug, str) for slug in slugs
+        ):
+            raise BadRequest("Request body must include a list of slugs")
+
+        collections = current_group_collections_service.read_many(
+            system_identity, slugs, fields=self._requested_fields()
         )
 
-        return jsonify(results.to_dict()), 200
+        response_data = {
+            "collections": {
+                slug: (
+                    collection
+                    if collection is not None
+                    else {
+                        "message": f"No collection found with the slug {slug}",
+                        "status": 404,
+                    }
+                )
+                for slug, collection in collections.items()
+            }
+        }
+
+        return jsonify(response_data), 200
+
+    @request_parsed_args
+    def export(self):
+        """Stream all matching collections as newline-delimited JSON."""
+        commons_instance = resource_requestctx.args.get("commons_instance")
+        commons_group_id = resource_requestctx.args.get("commons_group_id")
+
+        lines = current_group_collections_service.export(
+            system_identity, commons_instance, commons_group_id
+        )
+
+        return Response(
+            stream_with_context(lines),
+            status=200,
+            mimetype="application/x-ndjson",
+        )
 
     @request_parsed_args
     @request_data
@@ -219,6 +393,17 @@ class GroupCollectionsResource(Resource):
             "collection_visibility"
         )
 
+        if resource_requestctx.args.get("run_async"):
+            job = current_group_collections_service.submit_job(
+                system_identity,
+                "create",
+                commons_group_id=commons_group_id,
+                commons_instance=commons_instance,
+                restore_deleted=restore_deleted,
+                collection_visibility=collection_visibility,
+            )
+            return self._job_accepted_response(job)
+
         new_collection = current_group_collections_service.create(
             system_identity,
             commons_group_id,
@@ -236,6 +421,59 @@ class GroupCollectionsResource(Resource):
 
         return jsonify(response_data), 201
 
+    bulk_create_schema = ma.Schema.from_dict(
+        {
+            "commons_instance": ma.fields.String(required=True),
+            "commons_group_id": ma.fields.String(required=True),
+            "collection_visibility": ma.fields.String(
+                validate=ma.validate.OneOf(["public", "restricted"]),
+                load_default="public",
+            ),
+        }
+    )
+
+    def _error_response_data(self, error: Exception) -> dict:
+        """Serialize an exception the way the resource's error handlers do."""
+        for exc_cls in type(error).__mro__:
+            if exc_cls in self.error_handlers:
+                response_data, _status = self.error_handlers[exc_cls](error)
+                return response_data
+        return {"message": str(error), "status": 500}
+
+    @request_parsed_args
+    @request_data
+    def bulk_create(self):
+        """Create collections for many Commons groups."""
+        groups = (resource_requestctx.data or {}).get("groups")
+        if not isinstance(groups, list):
+            raise BadRequest("Request body must include a list of groups")
+        groups = self.bulk_create_schema(many=True).load(groups)
+        restore_deleted = resource_requestctx.args.get("restore_deleted")
+
+        results = current_group_collections_service.bulk_create(
+            system_identity, groups, restore_deleted=restore_deleted
+        )
+
+        response_data = {"results": []}
+        for result in results:
+            item = {
+                "commons_instance": result["commons_instance"],
+                "commons_group_id": result["commons_group_id"],
+            }
+            if result["error"] is None:
+                item.update(
+                    {
+                        "status": 201,
+                        "collection": result["collection"].data["slug"],
+                        "collection_id": result["collection"].data["id"],
+                    }
+                )
+            else:
+                item.update(self._error_response_data(result["error"]))
+            response_data["results"].append(item)
+
+        return jsonify(response_data), 200
+
     def change_group_ownership(self, collection_slug):
         # Implement the logic for handling PATCH requests to change
         # group ownership
@@ -289,6 +527,16 @@ class GroupCollectionsResource(Resource):
             app.logger.error("No commons_group_id provided. Could not delete.")
             raise BadRequest("No commons_group_id provided")
 
+        if resource_requestctx.args.get("run_async"):
+            job = current_group_collections_service.submit_job(
+                system_identity,
+                "delete",
+                collection_slug=collection_slug,
+                commons_instance=commons_instance,
+                commons_group_id=commons_group_id,
+            )
+            return self._job_accepted_response(job)
+
         deleted_collection = current_group_collections_service.delete(
             system_identity,
             collection_slug,
@@ -305,6 +553,49 @@ class GroupCollectionsResource(Resource):
             204,
         )
 
+    def _job_response_data(self, job: dict) -> dict:
+        """Serialize a job record with a link to its status endpoint.
+
+        The checkpoint of reassigned members kept for disown jobs can be
+        large, so it is left out; the job's progress gives its counts.
+        """
+        return {
+            **{k: v for k, v in job.items() if k != "checkpoint"},
+            "links": {
+                "self": url_for(
+                    "group_collections.read_job", job_id=job["id"], _external=True
+                )
+            },
+        }
+
+    def _job_accepted_response(self, job: dict):
+        """Return a 202 response for a submitted or resumed background job."""
+        response_data = self._job_response_data(job)
+        response = jsonify(response_data)
+        response.status_code = 202
+        response.headers["Location"] = response_data["links"]["self"]
+        return response
+
+    @request_parsed_view_args
+    def read_job(self):
+        """Return the status, progress and result of a background job."""
+        job = current_group_collections_service.read_job(
+            system_identity, resource_requestctx.view_args.get("job_id")
+        )
+        return jsonify(self._job_response_data(job)), 200
+
+    @request_parsed_view_args
+    def resume_job(self):
+        """Queue a failed or stale background job to run again.
+
+        Jobs that a live worker is still running, or that have already
+        succeeded, are not run again; their current record is returned.
+        """
+        job = current_group_collections_service.resume_job(
+            system_identity, resource_requestctx.view_args.get("job_id")
+        )
+        return self._job_accepted_response(job)
+
     def failed_delete(self):
         """Error response for missing collection slug."""
         raise BadRequest("No collection slug provided")
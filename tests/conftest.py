@@ -24,6 +24,9 @@ from invenio_administration.permissions import administration_access_action
 from invenio_app.factory import create_api
 from invenio_communities.communities.records.api import Community
 from invenio_communities.proxies import current_communities
+from invenio_group_collections_kcworks.proxies import (
+    current_group_collections_service,
+)
 from invenio_oauth2server.models import Token
 from invenio_records_resources.services.custom_fields import TextCF
 from invenio_records_resources.services.custom_fields.errors import (
@@ -78,6 +81,7 @@ test_config = {
         "R": "Remote",
     },
     "FILES_REST_DEFAULT_STORAGE_CLASS": "L",
+    "GROUP_COLLECTIONS_AVATAR_ASYNC": False,
 }
 
 test_config["SSO_SAML_IDPS"] = {
@@ -778,3 +782,63 @@ def sample_community1(app, communities_service, user_factory):
     sample1["create_func"] = create_sample1
 
     return sample1
+
+
+@pytest.fixture(scope="function")
+def group_member_collection(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+    user_factory,
+):
+    """Create a collection for sample group 1 with a user in each group role.
+
+    The group roles that are members of the collection (apart from the
+    admin role) are each given one new user.
+
+    Returns:
+        A dictionary with the created ``collection``, the
+        ``group_remote_id`` and the ``members`` added through the group
+        roles, as a list of [collection role, user id] pairs.
+    """
+    group_remote_id = sample_community1["api_response"]["id"]
+    with app.app_context():
+        update_url = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"][
+            "knowledgeCommons"
+        ]["url"]
+        requests_mock.get(
+            update_url.replace("{id}", group_remote_id),
+            json=sample_community1["api_response"],
+        )
+        collection = current_group_collections_service.create(
+            system_identity, group_remote_id, "knowledgeCommons"
+        )
+
+        member_model = current_communities.service.members.record_cls.model_cls
+        group_roles = {
+            m.group_id: m.role
+            for m in member_model.query.filter(
+                member_model.community_id == collection.id,
+                member_model.group_id.isnot(None),
+                member_model.group_id != "admin",
+            )
+        }
+        members = []
+        for i, role_id in enumerate(group_roles):
+            user = user_factory(email=f"member{i}@example.org").user
+            current_accounts.datastore.add_role_to_user(
+                user, current_accounts.datastore.find_role_by_id(role_id)
+            )
+            members.append([group_roles[role_id], str(user.id)])
+        current_accounts.datastore.commit()
+
+    return {
+        "collection": collection,
+        "group_remote_id": group_remote_id,
+        "members": members,
+    }
@@ -0,0 +1,142 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Unit tests for the pooled Commons API client."""
+
+from invenio_group_collections_kcworks.api_client import CommonsAPIClient
+from invenio_group_collections_kcworks.cache import GroupMetadataCache
+from invenio_group_collections_kcworks.proxies import (
+    current_group_collections_api_client,
+)
+
+
+def test_api_client_init(app):
+    """Test that the extension provides a pooled client."""
+    with app.app_context():
+        assert isinstance(current_group_collections_api_client, CommonsAPIClient)
+
+
+def test_api_client_reuses_sessions(app, requests_mock):
+    """Test that requests for one instance share a single session."""
+    with app.app_context():
+        client = current_group_collections_api_client
+        session = client.session_for("knowledgeCommons")
+        assert client.session_for("knowledgeCommons") is session
+        assert client.session_for() is not session
+
+        requests_mock.get("https://example.org/groups/1", json={"id": "1"})
+        response = client.get(
+            "https://example.org/groups/1", commons_instance="knowledgeCommons"
+        )
+        assert response.json() == {"id": "1"}
+        assert requests_mock.last_request.timeout == client.timeout_for(
+            "knowledgeCommons"
+        )
+
+
+def test_group_metadata_cache_revalidation(app, requests_mock):
+    """Test that cached group metadata is revalidated with its ETag."""
+    with app.app_context():
+        client = current_group_collections_api_client
+        client.metadata_cache.delete("knowledgeCommons", "42")
+        url = "https://example.org/groups/42"
+
+        requests_mock.get(url, json={"id": "42"}, headers={"ETag": '"v1"'})
+        first = client.get_group_metadata("knowledgeCommons", "42", url)
+        assert first.json() == {"id": "42"}
+        assert requests_mock.call_count == 1
+
+        # a fresh entry is served without a request
+        cached = client.get_group_metadata("knowledgeCommons", "42", url)
+        assert cached.json() == {"id": "42"}
+        assert requests_mock.call_count == 1
+
+        # a forced revalidation sends the validator and accepts a 304
+        requests_mock.get(url, status_code=304)
+        revalidated = client.get_group_metadata(
+            "knowledgeCommons", "42", url, revalidate=True
+        )
+        assert requests_mock.call_count == 2
+        assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+        assert revalidated.json() == {"id": "42"}
+
+        client.metadata_cache.delete("knowledgeCommons", "42")
+
+
+def test_group_metadata_cache_skips_mismatched_payloads(app, requests_mock):
+    """Test that a payload for another group is not cached."""
+    with app.app_context():
+        client = current_group_collections_api_client
+        client.metadata_cache.delete("knowledgeCommons", "43")
+        url = "https://example.org/groups/43"
+
+        requests_mock.get(url, json={"results": {"id": "1"}})
+        client.get_group_metadata("knowledgeCommons", "43", url)
+        assert client.metadata_cache.get("knowledgeCommons", "43", url) is None
+
+        # once the group exists it is fetched again rather than served stale
+        requests_mock.get(url, json={"results": {"id": "43"}})
+        response = client.get_group_metadata("knowledgeCommons", "43", url)
+        assert response.json() == {"results": {"id": "43"}}
+        assert requests_mock.call_count == 2
+
+        client.metadata_cache.delete("knowledgeCommons", "43")
+
+
+def test_group_metadata_cache_is_keyed_by_url(app, requests_mock):
+    """Test that payloads from different endpoints are cached separately."""
+    with app.app_context():
+        client = current_group_collections_api_client
+        client.metadata_cache.delete("knowledgeCommons", "44")
+        first_url = "https://example.org/groups/44"
+        second_url = "https://example.org/other-api/groups/44"
+
+        requests_mock.get(first_url, json={"id": "44", "name": "First"})
+        requests_mock.get(
+            second_url, json={"id": "44", "name": "Second"}, headers={"ETag": '"b"'}
+        )
+        first = client.get_group_metadata("knowledgeCommons", "44", first_url)
+        second = client.get_group_metadata("knowledgeCommons", "44", second_url)
+        assert first.json()["name"] == "First"
+        assert second.json()["name"] == "Second"
+        assert requests_mock.call_count == 2
+
+        cached = client.get_group_metadata("knowledgeCommons", "44", first_url)
+        assert cached.json()["name"] == "First"
+        assert requests_mock.call_count == 2
+
+        # revalidation sends the validator of the entry for the same url
+        requests_mock.get(first_url, status_code=304)
+        client.get_group_metadata(
+            "knowledgeCommons", "44", first_url, revalidate=True
+        )
+        assert "If-None-Match" not in requests_mock.last_request.headers
+
+        # deleting a group drops the entries for all of its urls
+        client.metadata_cache.delete("knowledgeCommons", "44")
+        assert client.metadata_cache.get("knowledgeCommons", "44", first_url) is None
+        assert client.metadata_cache.get("knowledgeCommons", "44", second_url) is None
+
+
+def test_group_metadata_cache_local_copies_expire(app, monkeypatch):
+    """Test that deletions by other workers reach local copies."""
+    with app.app_context():
+        # two workers sharing the Redis cache
+        cache, other_cache = GroupMetadataCache(app), GroupMetadataCache(app)
+        url = "https://example.org/groups/45"
+        cache.set("knowledgeCommons", "45", url, {"id": "45"})
+        assert other_cache.get("knowledgeCommons", "45", url)["payload"] == {
+            "id": "45"
+        }
+
+        cache.delete("knowledgeCommons", "45")
+        assert cache.get("knowledgeCommons", "45", url) is None
+        # the other worker's local copy is trusted for a few seconds only
+        assert other_cache.get("knowledgeCommons", "45", url) is not None
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_METADATA_LOCAL_TTL", 0)
+        assert other_cache.get("knowledgeCommons", "45", url) is None
@@ -9,14 +9,27 @@
 """Unit tests for the invenio-group-collections-kcworks service."""
 
 # from pprint import pprint
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
 import pytest
+import requests
+from celery.exceptions import Retry
 from invenio_access.permissions import system_identity
 from invenio_accounts import current_accounts
+from invenio_accounts.models import User
 from invenio_communities.communities.records.api import Community
 from invenio_communities.proxies import current_communities
 from invenio_group_collections_kcworks.errors import (
+    AvatarNotFetchedError,
     CollectionAlreadyExistsError,
+    CollectionNotFoundError,
     CommonsGroupNotFoundError,
+    JobRunningError,
+)
+from invenio_group_collections_kcworks.ext import (
+    clear_owner_cache_on_update,
+    register_owner_cache_listeners,
 )
 from invenio_group_collections_kcworks.proxies import (
     current_group_collections,
@@ -24,9 +37,16 @@ from invenio_group_collections_kcworks.proxies import (
 from invenio_group_collections_kcworks.proxies import (
     current_group_collections_service as current_collections,
 )
+from invenio_group_collections_kcworks import service, service_config, tasks
 from invenio_group_collections_kcworks.service import (
     GroupCollectionsService,
 )
+from invenio_group_collections_kcworks.service_config import (
+    GroupCollectionsFilterParam,
+)
+from invenio_group_collections_kcworks.utils import find_collection_owner
+from invenio_search.engine import dsl
+from sqlalchemy import event
 
 
 def test_collections_service_init(app):
@@ -38,6 +58,63 @@ def test_collections_service_init(app):
         assert isinstance(collections_service, GroupCollectionsService)
 
 
+def test_collection_owner_cache(app, db, admin, monkeypatch):
+    """Test that the owner ids are cached until an owner attribute changes."""
+    with app.app_context():
+        owner_cache = current_group_collections.owner_cache
+        owner_cache.clear()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return find_collection_owner()
+
+        admin_role = current_accounts.datastore.find_role("admin")
+        assert owner_cache.get(loader)[1] == admin_role.id
+        assert owner_cache.get(loader)[1] == admin_role.id
+        assert calls == [1]
+
+        # updating other attributes of a user does not clear the cache
+        admin.user.confirmed_at = datetime.utcnow()
+        db.session.commit()
+        owner_cache.get(loader)
+        assert calls == [1]
+
+        # changing a user's roles or email does
+        role = current_accounts.datastore.find_or_create_role("administrator")
+        current_accounts.datastore.add_role_to_user(admin.user, role)
+        current_accounts.datastore.commit()
+        owner_cache.get(loader)
+        assert calls == [1, 1]
+
+        admin.user.email = "new-admin@inveniosoftware.org"
+        db.session.commit()
+        owner_cache.get(loader)
+        assert calls == [1, 1, 1]
+
+        # role updates only clear the cache when the name changes
+        role.description = "Administrators"
+        db.session.commit()
+        owner_cache.get(loader)
+        assert calls == [1, 1, 1]
+
+        role.name = "administrators"
+        db.session.commit()
+        owner_cache.get(loader)
+        assert calls == [1, 1, 1, 1]
+
+        # registering the listeners again does not add duplicates
+        register_owner_cache_listeners()
+        assert event.contains(User, "after_update", clear_owner_cache_on_update)
+
+        # entries expire after the configured TTL
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_OWNER_CACHE_TTL", 0)
+        owner_cache.clear()
+        owner_cache.get(loader)
+        owner_cache.get(loader)
+        assert calls == [1, 1, 1, 1, 1, 1]
+
+
 def test_collections_service_create(
     app,
     db,
@@ -229,3 +306,667 @@ def test_collections_service_create_already_exists(
                 "1004290",
                 "knowledgeCommons",
             )
+
+
+def test_collections_service_create_not_found_is_cached(
+    app, db, requests_mock, not_found_response_body, search_clear, location
+):
+    """Test that a not-found group is not looked up again right away."""
+    with app.app_context():
+        update_url = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"][
+            "knowledgeCommons"
+        ][
+            "url"
+        ]  # noqa
+        mocked = requests_mock.get(
+            update_url.replace("{id}", "1004290222"),
+            status_code=404,
+            json=not_found_response_body,
+        )
+        not_found_cache = current_group_collections.not_found_cache
+        not_found_cache.delete("knowledgeCommons", "1004290222")
+
+        for _ in range(2):
+            with pytest.raises(CommonsGroupNotFoundError):
+                current_collections.create(
+                    system_identity, "1004290222", "knowledgeCommons"
+                )
+        assert mocked.call_count == 1
+
+        # the group is looked up again once the entry is invalidated
+        not_found_cache.delete("knowledgeCommons", "1004290222")
+        with pytest.raises(CommonsGroupNotFoundError):
+            current_collections.create(
+                system_identity, "1004290222", "knowledgeCommons"
+            )
+        assert mocked.call_count == 2
+
+
+def test_collections_service_create_batches_memberships(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+    monkeypatch,
+):
+    """Test that memberships are added with one call per role level."""
+    group_remote_id = sample_community1["api_response"]["id"]
+    with app.app_context():
+        update_url = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"][
+            "knowledgeCommons"
+        ][
+            "url"
+        ]  # noqa
+        requests_mock.get(
+            update_url.replace("{id}", group_remote_id),
+            json=sample_community1["api_response"],
+        )
+
+        members_service = current_communities.service.members
+        calls = []
+        original_add = members_service.add
+
+        def counting_add(identity, community_id, data, **kwargs):
+            calls.append(data["role"])
+            return original_add(identity, community_id, data, **kwargs)
+
+        monkeypatch.setattr(members_service, "add", counting_add)
+
+        actual = current_collections.create(
+            system_identity, group_remote_id, "knowledgeCommons"
+        )
+
+        assert sorted(calls) == sorted(set(calls))
+        members = members_service.record_cls.model_cls.query.filter_by(
+            community_id=actual.id
+        ).all()
+        group_ids = [m.group_id for m in members if m.group_id]
+        assert len(group_ids) == len(set(group_ids))
+        assert any(m.user_id == admin.user.id for m in members)
+
+
+def test_collections_service_update_avatar_dedup(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+    monkeypatch,
+):
+    """Test that an unchanged avatar is not uploaded again."""
+    with app.app_context():
+        community = sample_community1["create_func"]()
+        avatar_url = "https://hcommons-dev.org/avatars/the-inklings.png"
+        requests_mock.get(avatar_url, content=b"\x89PNG fake avatar")
+
+        uploads = []
+        original_update_logo = current_communities.service.update_logo
+
+        def counting_update_logo(*args, **kwargs):
+            uploads.append(args)
+            return original_update_logo(*args, **kwargs)
+
+        monkeypatch.setattr(
+            current_communities.service, "update_logo", counting_update_logo
+        )
+
+        assert current_collections.update_avatar(avatar_url, community.id)
+        assert current_collections.update_avatar(avatar_url, community.id)
+        assert len(uploads) == 1
+
+        requests_mock.get(avatar_url, content=b"\x89PNG other avatar")
+        assert current_collections.update_avatar(avatar_url, community.id)
+        assert len(uploads) == 2
+
+
+def test_collections_service_update_avatar_too_large(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+):
+    """Test that an oversized avatar is refused."""
+    with app.app_context():
+        community = sample_community1["create_func"]()
+        avatar_url = "https://hcommons-dev.org/avatars/huge.png"
+        max_size = app.config["GROUP_COLLECTIONS_AVATAR_MAX_SIZE"]
+        requests_mock.get(avatar_url, content=b"0" * (max_size + 1))
+
+        assert not current_collections.update_avatar(avatar_url, community.id)
+
+
+def test_collections_service_schedule_avatar_update(app, db, monkeypatch):
+    """Test that the avatar task is only queued after a commit."""
+    with app.app_context():
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_AVATAR_ASYNC", True)
+        events = []
+
+        def record_commit(session):
+            events.append("commit")
+
+        monkeypatch.setattr(
+            tasks.update_collection_avatar,
+            "delay",
+            lambda *args, **kwargs: events.append(("delay", args)),
+        )
+        event.listen(db.session, "after_commit", record_commit)
+        try:
+            current_collections.schedule_avatar_update(
+                "https://hcommons-dev.org/avatars/the-inklings.png",
+                "community-id",
+                commons_instance="knowledgeCommons",
+            )
+        finally:
+            event.remove(db.session, "after_commit", record_commit)
+
+        assert events == [
+            "commit",
+            (
+                "delay",
+                (
+                    "https://hcommons-dev.org/avatars/the-inklings.png",
+                    "community-id",
+                    "knowledgeCommons",
+                ),
+            ),
+        ]
+
+
+def test_update_collection_avatar_task_retries(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+    monkeypatch,
+):
+    """Test that the avatar task retries transient failures with backoff."""
+    with app.app_context():
+        community = sample_community1["create_func"]()
+        avatar_url = "https://hcommons-dev.org/avatars/the-inklings.png"
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_AVATAR_TASK_BACKOFF", 10)
+        monkeypatch.setitem(
+            app.config, "GROUP_COLLECTIONS_AVATAR_TASK_MAX_RETRIES", 3
+        )
+
+        countdowns = []
+        original_retry = tasks.update_collection_avatar.retry
+
+        def recording_retry(*args, **kwargs):
+            countdowns.append(kwargs["countdown"])
+            return original_retry(*args, **kwargs)
+
+        monkeypatch.setattr(tasks.update_collection_avatar, "retry", recording_retry)
+
+        # a timeout and a server error are retried, with doubling backoff
+        avatar = requests_mock.get(
+            avatar_url,
+            [
+                {"exc": requests.exceptions.ConnectTimeout},
+                {"status_code": 503, "text": "unavailable"},
+                {"status_code": 200, "content": b"\x89PNG fake avatar"},
+            ],
+        )
+        result = tasks.update_collection_avatar.delay(avatar_url, str(community.id))
+        assert result.get() is True
+        assert countdowns == [10, 20]
+        assert avatar.call_count == 3
+
+        # the task gives up after the configured number of retries
+        countdowns.clear()
+        avatar = requests_mock.get(avatar_url, status_code=502, text="bad gateway")
+        with pytest.raises(AvatarNotFetchedError):
+            tasks.update_collection_avatar.delay(avatar_url, str(community.id))
+        assert countdowns == [10, 20, 40, 80]
+        assert avatar.call_count == 4
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        {"status_code": 404, "text": "not found"},
+        {"status_code": 403, "text": "forbidden"},
+        {"status_code": 200, "content": b"0" * 5242881},
+    ],
+)
+def test_update_collection_avatar_task_no_retry(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+    monkeypatch,
+    response,
+):
+    """Test that client errors and oversized avatars are not retried."""
+    with app.app_context():
+        community = sample_community1["create_func"]()
+        avatar_url = "https://hcommons-dev.org/avatars/the-inklings.png"
+        monkeypatch.setitem(
+            app.config, "GROUP_COLLECTIONS_AVATAR_MAX_SIZE", 5242880
+        )
+        retries = []
+        monkeypatch.setattr(
+            tasks.update_collection_avatar,
+            "retry",
+            lambda *args, **kwargs: retries.append(kwargs),
+        )
+        avatar = requests_mock.get(avatar_url, **response)
+
+        result = tasks.update_collection_avatar.delay(avatar_url, str(community.id))
+
+        assert result.get() is False
+        assert retries == []
+        assert avatar.call_count == 1
+
+
+def test_collections_service_read_by_slug(
+    app,
+    db,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+):
+    """Test that reads resolve slugs through the slug cache."""
+    with app.app_context():
+        sample_communities(app, communities_service)
+        slug_cache = current_group_collections.slug_cache
+        slug_cache.clear()
+
+        collection = current_collections.read(system_identity, "community-1")
+        assert collection["slug"] == "community-1"
+        assert slug_cache.get("community-1") == collection["id"]
+
+        # a stale cache entry is detected and replaced
+        slug_cache.set("community-2", collection["id"])
+        collection_2 = current_collections.read(system_identity, "community-2")
+        assert collection_2["slug"] == "community-2"
+        assert slug_cache.get("community-2") == collection_2["id"]
+
+        with pytest.raises(CollectionNotFoundError):
+            current_collections.read(system_identity, "collection-nonexistent")
+        assert slug_cache.get("collection-nonexistent") is None
+
+
+def test_collections_service_bulk_create(
+    app,
+    db,
+    requests_mock,
+    search_clear,
+    sample_community1,
+    location,
+    custom_fields,
+    admin,
+):
+    """Test creating collections for several groups at once."""
+    group_remote_id = sample_community1["api_response"]["id"]
+    api_response = sample_community1["api_response"]
+
+    with app.app_context():
+        update_url = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"][
+            "knowledgeCommons"
+        ]["url"]
+        metadata_mock = requests_mock.get(
+            update_url.replace("{id}", group_remote_id),
+            json=api_response,
+        )
+        requests_mock.get(
+            update_url.replace("{id}", "1004290111"),
+            status_code=404,
+        )
+        requests_mock.get(
+            "https://hcommons-dev.org/app/plugins/buddypress/bp-core/images/mystery-group.png",  # noqa
+            status_code=404,
+        )
+
+        results = current_collections.bulk_create(
+            system_identity,
+            [
+                {
+                    "commons_instance": "knowledgeCommons",
+                    "commons_group_id": group_remote_id,
+                },
+                {
+                    "commons_instance": "knowledgeCommons",
+                    "commons_group_id": "1004290111",
+                },
+            ],
+        )
+
+        assert [r["commons_group_id"] for r in results] == [
+            group_remote_id,
+            "1004290111",
+        ]
+        assert results[0]["error"] is None
+        assert results[0]["collection"].data["slug"] == "the-inklings"
+        assert isinstance(results[1]["error"], CommonsGroupNotFoundError)
+        assert results[1]["collection"] is None
+        # the prefetched metadata was reused by create
+        assert metadata_mock.call_count == 1
+
+
+def test_collections_service_disown(app, db, group_member_collection):
+    """Test that disown turns group memberships into direct memberships."""
+    collection = group_member_collection["collection"]
+    group_remote_id = group_member_collection["group_remote_id"]
+    expected = group_member_collection["members"]
+    with app.app_context():
+        progress = []
+        current_collections.disown(
+            system_identity,
+            collection.id,
+            collection.data["slug"],
+            group_remote_id,
+            "knowledgeCommons",
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        member_model = current_communities.service.members.record_cls.model_cls
+        members = member_model.query.filter_by(community_id=collection.id).all()
+        assert not [m for m in members if m.group_id and m.group_id != "admin"]
+        direct_roles = {str(m.user_id): m.role for m in members if m.user_id}
+        for role, user_id in expected:
+            assert direct_roles[user_id] == role
+        assert progress[-1] == (len(expected), len(expected))
+
+
+def test_collections_service_refresh_index(app, monkeypatch):
+    """Test that the index refresh follows the configured policy."""
+    with app.app_context():
+        refresh_calls = []
+        monkeypatch.setattr(
+            current_communities.service.record_cls.index,
+            "refresh",
+            lambda *args, **kwargs: refresh_calls.append(kwargs),
+        )
+
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_INDEX_REFRESH", "none")
+        current_collections.refresh_index()
+        assert refresh_calls == []
+
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_INDEX_REFRESH", "records")
+        current_collections.refresh_index()
+        assert len(refresh_calls) == 1
+
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_INDEX_REFRESH", "bogus")
+        with pytest.raises(ValueError):
+            current_collections.refresh_index()
+
+
+def test_collections_service_disown_job_checkpoint(
+    app, db, group_member_collection, monkeypatch
+):
+    """Test that a disown job checkpoints the members it reassigns."""
+    collection = group_member_collection["collection"]
+    group_remote_id = group_member_collection["group_remote_id"]
+    expected = group_member_collection["members"]
+    with app.app_context():
+        job = current_collections.submit_job(
+            system_identity,
+            "disown",
+            eager=True,
+            collection_id=collection.id,
+            collection_slug=collection.data["slug"],
+            remote_group_id=group_remote_id,
+            remote_instance_name="knowledgeCommons",
+        )
+
+        assert job["status"] == "succeeded"
+        assert sorted(job["checkpoint"]) == sorted(expected)
+        assert job["progress"] == {"done": len(expected), "total": len(expected)}
+
+        # running a finished job again does nothing
+        calls = []
+        monkeypatch.setattr(
+            current_collections, "disown", lambda *args, **kwargs: calls.append(1)
+        )
+        current_collections.run_job(job["id"], "disown", job["params"])
+        assert calls == []
+
+
+def test_collections_service_disown_job_resume(
+    app, db, group_member_collection, monkeypatch
+):
+    """Test that a resumed disown job skips checkpointed members."""
+    collection = group_member_collection["collection"]
+    group_remote_id = group_member_collection["group_remote_id"]
+    expected = group_member_collection["members"]
+    with app.app_context():
+        assert len(expected) > 1
+
+        # a job that failed after reassigning its first member
+        job_store = current_group_collections.job_store
+        job = job_store.create(
+            "disown",
+            {
+                "collection_id": str(collection.id),
+                "collection_slug": collection.data["slug"],
+                "remote_group_id": group_remote_id,
+                "remote_instance_name": "knowledgeCommons",
+            },
+        )
+        job_store.update(job["id"], status="failed", checkpoint=[expected[0]])
+
+        added = []
+        original_add = service.add_members_to_community
+
+        def add_members(community_id, members_by_role, **kwargs):
+            added.extend(m["id"] for ms in members_by_role.values() for m in ms)
+            return original_add(community_id, members_by_role, **kwargs)
+
+        monkeypatch.setattr(service, "add_members_to_community", add_members)
+
+        current_collections.resume_job(system_identity, job["id"])
+
+        job = job_store.get(job["id"])
+        assert job["status"] == "succeeded"
+        assert expected[0][1] not in added
+        assert sorted(added) == sorted(user_id for _, user_id in expected[1:])
+        assert sorted(job["checkpoint"]) == sorted(expected)
+
+
+def test_collections_service_resume_job_lease(app, monkeypatch):
+    """Test that jobs with a live worker are not run again."""
+    with app.app_context():
+        job_store = current_group_collections.job_store
+        job = job_store.create("delete", {"collection_slug": "test-collection"})
+        job = job_store.update(job["id"], status="running")
+
+        calls = []
+
+        def delete(*args, **kwargs):
+            calls.append(1)
+            raise CollectionNotFoundError("test-collection")
+
+        monkeypatch.setattr(current_collections, "delete", delete)
+
+        # the job's worker is still updating it, so it is left alone
+        job = current_collections.resume_job(system_identity, job["id"])
+        assert job["status"] == "running"
+        with pytest.raises(JobRunningError):
+            current_collections.run_job(job["id"], "delete", job["params"])
+        assert calls == []
+
+        # a redelivered task is retried once the lease has expired
+        retries = []
+        monkeypatch.setattr(
+            tasks.run_collection_job,
+            "retry",
+            lambda **kwargs: retries.append(kwargs) or Retry(),
+        )
+        tasks.run_collection_job.delay(job["id"], "delete", job["params"])
+        assert calls == []
+        assert len(retries) == 1
+        assert retries[0]["max_retries"] is None
+        assert 0 < retries[0]["countdown"] <= job_store.lease
+
+        # once the lease has expired the job is run again
+        lease = app.config.get("GROUP_COLLECTIONS_JOB_LEASE", 600)
+        job_store._save(
+            {
+                **job,
+                "updated": (
+                    datetime.now(timezone.utc) - timedelta(seconds=lease + 1)
+                ).isoformat(),
+            }
+        )
+        current_collections.resume_job(system_identity, job["id"])
+        assert calls == [1]
+        job = job_store.get(job["id"])
+        assert job["status"] == "failed"
+        assert job["error"]["type"] == "CollectionNotFoundError"
+
+        # failed jobs can be resumed straight away
+        current_collections.resume_job(system_identity, job["id"])
+        assert calls == [1, 1]
+
+
+def test_collections_service_submit_job_key(app, monkeypatch):
+    """Test that a job submitted with a key resumes an unfinished one."""
+    with app.app_context():
+        outcomes = [CollectionNotFoundError("test-collection")]
+
+        def delete(*args, **kwargs):
+            if outcomes:
+                raise outcomes.pop()
+            return SimpleNamespace(data={"slug": "test-collection", "id": "1"})
+
+        monkeypatch.setattr(current_collections, "delete", delete)
+
+        failed = current_collections.submit_job(
+            system_identity,
+            "delete",
+            eager=True,
+            key="delete:test-collection",
+            collection_slug="test-collection",
+        )
+        assert failed["status"] == "failed"
+
+        resumed = current_collections.submit_job(
+            system_identity,
+            "delete",
+            eager=True,
+            key="delete:test-collection",
+            collection_slug="test-collection",
+        )
+        assert resumed["id"] == failed["id"]
+        assert resumed["status"] == "succeeded"
+
+        # once the job has succeeded, the key starts a new job
+        new = current_collections.submit_job(
+            system_identity,
+            "delete",
+            eager=True,
+            key="delete:test-collection",
+            collection_slug="test-collection",
+        )
+        assert new["id"] != failed["id"]
+        assert new["status"] == "succeeded"
+
+
+def test_collections_service_disown_plan(app, db, group_member_collection):
+    """Test that a disown plan reports the changes without making them."""
+    collection = group_member_collection["collection"]
+    group_remote_id = group_member_collection["group_remote_id"]
+    expected = group_member_collection["members"]
+    with app.app_context():
+        plan = current_collections.disown(
+            system_identity,
+            collection.id,
+            collection.data["slug"],
+            group_remote_id,
+            "knowledgeCommons",
+            plan=True,
+        )
+
+        assert plan["collection_slug"] == collection.data["slug"]
+        assert plan["dropped_group_memberships"]["count"] == len(expected)
+        assert plan["added_users"]["count"] == len(expected)
+        assert sum(plan["added_users"]["by_role"].values()) == len(expected)
+        assert plan["index_writes"] == 2 * len(expected) + 1
+
+        # nothing was changed
+        member_model = current_communities.service.members.record_cls.model_cls
+        members = member_model.query.filter_by(community_id=collection.id).all()
+        group_ids = [m.group_id for m in members if m.group_id]
+        assert len([g for g in group_ids if g != "admin"]) == len(expected)
+        assert not [m for m in members if m.user_id and m.role != "owner"]
+        assert (
+            current_collections.read(system_identity, collection.data["slug"])[
+                "custom_fields"
+            ]["kcr:commons_group_id"]
+            == group_remote_id
+        )
+
+
+def test_collections_service_disown_plan_batches(app, monkeypatch):
+    """Test that planned member service calls follow the batch limit."""
+    with app.app_context():
+        monkeypatch.setitem(app.config, "GROUP_COLLECTIONS_MEMBER_CHUNK_SIZE", 500)
+        members_by_role = {
+            "reader": [{"type": "user", "id": str(i)} for i in range(150)],
+            "curator": [{"type": "user", "id": str(i)} for i in range(150, 160)],
+        }
+
+        plan = current_collections._disown_plan(
+            "collection-id", "my-collection", [], members_by_role
+        )
+
+        assert plan["added_users"]["count"] == 160
+        assert plan["member_service_calls"] == 3
+        assert plan["index_writes"] == 161
+
+
+@pytest.mark.parametrize(
+    "mapped,query,field",
+    [
+        (True, "term", "custom_fields.kcr:commons_group_id.keyword"),
+        (False, "match_phrase", "custom_fields.kcr:commons_group_id"),
+    ],
+)
+def test_collections_filter_param_fallback(app, monkeypatch, mapped, query, field):
+    """Test that text fields are filtered when keyword fields are unmapped."""
+    with app.app_context():
+        monkeypatch.setattr(service_config, "field_is_mapped", lambda f: mapped)
+
+        search = GroupCollectionsFilterParam(None).apply(
+            system_identity,
+            dsl.Search(),
+            {"commons_instance": "knowledgeCommons", "commons_group_id": "1004290"},
+        )
+
+        filters = search.to_dict()["query"]["bool"]["filter"][0]["bool"]["filter"]
+        assert {query: {field: "1004290"}} in filters
+
+
+def test_collections_filter_param_real_mapping(
+    app, db, search_clear, sample_community1, location, custom_fields
+):
+    """Test that the filters use a field that exists in the real mapping."""
+    with app.app_context():
+        search = GroupCollectionsFilterParam(None).apply(
+            system_identity,
+            dsl.Search(),
+            {"commons_instance": "knowledgeCommons"},
+        )
+        filters = search.to_dict()["query"]["bool"]["filter"][0]["bool"]["filter"]
+        field = filters[0]["exists"]["field"]
+        assert service_config.field_is_mapped(field)
@@ -0,0 +1,233 @@
+#
+# This file is part of the invenio-group-collections-kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio-group-collections-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Unit tests for invenio-group-collections-kcworks utility functions."""
+
+from io import BytesIO
+
+import pytest
+from invenio_access.permissions import system_identity
+from invenio_accounts import current_accounts
+from invenio_communities.proxies import current_communities
+from invenio_group_collections_kcworks.errors import CollectionAlreadyExistsError
+from invenio_group_collections_kcworks.utils import (
+    MEMBERS_SERVICE_BATCH_LIMIT,
+    add_members_to_community,
+    allocate_group_slug,
+    bulk_find_or_create_roles,
+    decode_search_cursor,
+    encode_search_cursor,
+    find_group_memberships,
+    normalize_avatar,
+)
+from PIL import Image
+
+
+def test_bulk_find_or_create_roles(app, db):
+    """Test that existing roles are found and missing ones created."""
+    with app.app_context():
+        existing = current_accounts.datastore.find_or_create_role(
+            "knowledgeCommons---1004290|administrator"
+        )
+        current_accounts.datastore.commit()
+
+        names = [
+            "knowledgeCommons---1004290|administrator",
+            "knowledgeCommons---1004290|moderator",
+            "knowledgeCommons---1004290|member",
+            "knowledgeCommons---1004290|member",
+        ]
+        role_ids = bulk_find_or_create_roles(names)
+
+        assert sorted(role_ids.keys()) == sorted(set(names))
+        assert role_ids["knowledgeCommons---1004290|administrator"] == existing.id
+        for name, role_id in role_ids.items():
+            assert current_accounts.datastore.find_role(name).id == role_id
+        for name in names[1:]:
+            role = current_accounts.datastore.find_role(name)
+            assert role.id == name
+            assert role.is_managed
+
+        # a second call creates nothing new
+        assert bulk_find_or_create_roles(names) == role_ids
+
+
+def test_allocate_group_slug(
+    app, db, search_clear, sample_community1, location, custom_fields
+):
+    """Test that the first free slug is picked, skipping deleted ones."""
+    with app.app_context():
+        assert (
+            allocate_group_slug("the-inklings", "knowledgeCommons", "1004290")
+            == "the-inklings"
+        )
+
+        existing = current_communities.service.create(
+            system_identity, data=sample_community1["creation_metadata"]
+        )
+        with pytest.raises(CollectionAlreadyExistsError):
+            allocate_group_slug("the-inklings", "knowledgeCommons", "1004290")
+
+        # a collection belonging to another group only takes its slug
+        assert (
+            allocate_group_slug("the-inklings", "knowledgeCommons", "999")
+            == "the-inklings-1"
+        )
+
+        current_communities.service.delete(system_identity, existing.id)
+        assert (
+            allocate_group_slug("the-inklings", "knowledgeCommons", "1004290")
+            == "the-inklings-1"
+        )
+        assert (
+            allocate_group_slug(
+                "the-inklings",
+                "knowledgeCommons",
+                "1004290",
+                exclude={"the-inklings-1"},
+            )
+            == "the-inklings-2"
+        )
+
+        # only ``<base>-<n>`` slugs are considered, not other suffixes
+        current_communities.service.create(
+            system_identity,
+            data={
+                **sample_community1["creation_metadata"],
+                "slug": "the-inklings-archive",
+            },
+        )
+        assert (
+            allocate_group_slug("the-inklings", "knowledgeCommons", "1004290")
+            == "the-inklings-1"
+        )
+
+
+def test_find_group_memberships(
+    app, db, search_clear, sample_community1, location, custom_fields
+):
+    """Test that memberships are matched by the exact remote group."""
+    with app.app_context():
+        collection = current_communities.service.create(
+            system_identity, data=sample_community1["creation_metadata"]
+        )
+        role_ids = bulk_find_or_create_roles(
+            [
+                "knowledgeCommons---1|administrator",
+                "knowledgeCommons---1|member",
+                "knowledgeCommons---12|member",
+                "knowledgeCommons---1_|member",
+                "otherCommons---1|member",
+            ]
+        )
+        add_members_to_community(
+            collection.id,
+            {
+                "reader": [
+                    {"type": "group", "id": role_id} for role_id in role_ids.values()
+                ]
+            },
+        )
+
+        memberships = find_group_memberships(
+            "knowledgeCommons", "1", community_id=collection.id
+        )
+        assert sorted(m.group_id for m in memberships) == sorted(
+            [
+                role_ids["knowledgeCommons---1|administrator"],
+                role_ids["knowledgeCommons---1|member"],
+            ]
+        )
+        memberships = find_group_memberships("knowledgeCommons", "12")
+        assert [m.group_id for m in memberships] == [
+            role_ids["knowledgeCommons---12|member"]
+        ]
+
+
+def test_add_members_to_community_batches(
+    app, db, search_clear, sample_community1, location, custom_fields, monkeypatch
+):
+    """Test that large role levels are split at the members service limit."""
+    with app.app_context():
+        collection = current_communities.service.create(
+            system_identity, data=sample_community1["creation_metadata"]
+        )
+        role_ids = bulk_find_or_create_roles(
+            [f"knowledgeCommons---{i}|member" for i in range(150)]
+        )
+
+        members_service = current_communities.service.members
+        calls = []
+        original_add = members_service.add
+
+        def counting_add(identity, community_id, data, **kwargs):
+            calls.append(len(data["members"]))
+            return original_add(identity, community_id, data, **kwargs)
+
+        monkeypatch.setattr(members_service, "add", counting_add)
+
+        added = add_members_to_community(
+            collection.id,
+            {"reader": [{"type": "group", "id": i} for i in role_ids.values()]},
+            chunk_size=500,
+        )
+
+        assert calls == [MEMBERS_SERVICE_BATCH_LIMIT, 50]
+        assert len(added["reader"]) == 150
+
+
+def test_normalize_avatar(app):
+    """Test that avatars are downscaled and re-encoded."""
+    with app.app_context():
+        original = BytesIO()
+        Image.new("RGB", (2000, 1000), "red").save(original, format="JPEG")
+
+        normalized = Image.open(BytesIO(normalize_avatar(original.getvalue())))
+
+        max_width, max_height = app.config["GROUP_COLLECTIONS_AVATAR_MAX_DIMENSIONS"]
+        assert normalized.format == app.config["GROUP_COLLECTIONS_AVATAR_FORMAT"]
+        assert normalized.size[0] <= max_width
+        assert normalized.size[1] <= max_height
+        assert normalized.size[0] == 2 * normalized.size[1]
+
+        with pytest.raises(ValueError):
+            huge = BytesIO()
+            Image.new("1", (6000, 6000)).save(huge, format="PNG")
+            normalize_avatar(huge.getvalue())
+
+
+def test_normalize_avatar_decompression_bomb(app, monkeypatch):
+    """Test that images Pillow flags as decompression bombs are refused."""
+    with app.app_context():
+        monkeypatch.setitem(
+            app.config, "GROUP_COLLECTIONS_AVATAR_MAX_PIXELS", 100_000_000
+        )
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1_000_000)
+        # over the limit, which Pillow only warns about
+        warning = BytesIO()
+        Image.new("1", (1500, 1000)).save(warning, format="PNG")
+        # over twice the limit, which Pillow refuses to open
+        error = BytesIO()
+        Image.new("1", (2000, 2000)).save(error, format="PNG")
+
+        for bomb in [warning, error]:
+            with pytest.raises(ValueError):
+                normalize_avatar(bomb.getvalue())
+
+
+def test_search_cursor_round_trip():
+    """Test that search cursors decode to the values they were made from."""
+    cursor = encode_search_cursor("updated-desc", [1718000000000, "abc-123"])
+    assert decode_search_cursor(cursor, "updated-desc") == [
+        1718000000000,
+        "abc-123",
+    ]
+    with pytest.raises(ValueError):
+        decode_search_cursor(cursor, "newest")
+    with pytest.raises(ValueError):
+        decode_search_cursor("not-a-cursor", "updated-desc")
@@ -2,6 +2,9 @@ import json
 from copy import deepcopy
 
 import pytest
+from invenio_group_collections_kcworks.proxies import (
+    current_group_collections_service,
+)
 
 communities_data = {
     "knowledgeCommons": [
@@ -206,7 +209,7 @@ sample_communities_data = {
             404,
             {
                 "message": "No Works collection found matching the parameters"
-                " +_exists_:custom_fields.kcr\:commons_instance +custom_fields.kcr\:commons_instance:nonexistentCommons ",  # noqa
+                " commons_instance=nonexistentCommons, commons_group_id=None",
                 "status": 404,
             },
         ),
@@ -217,8 +220,7 @@ sample_communities_data = {
             404,
             {
                 "message": "No Works collection found matching the parameters"
-                " +_exists_:custom_fields.kcr\:commons_instance +custom_fields.kcr\:commons_instance:msuCommons "  # noqa
-                "+custom_fields.kcr\:commons_group_id:77777",  # noqa: W605
+                " commons_instance=msuCommons, commons_group_id=77777",
                 "status": 404,
             },
         ),
@@ -259,8 +261,8 @@ def test_group_collections_resource_search(
                 "next"
             ] = "https://127.0.0.1:5000/api/communities?page=2&q=&size=4&sort=newest"  # noqa
             expected_json["links"] = {
-                "prev": "https://127.0.0.1:5000/api/communities?page=1&q=%2B_exists_%3Acustom_fields.kcr%5C%3Acommons_instance%20&size=4&sort=newest",  # noqa
-                "self": "https://127.0.0.1:5000/api/communities?page=2&q=%2B_exists_%3Acustom_fields.kcr%5C%3Acommons_instance%20&size=4&sort=newest",  # noqa
+                "prev": "https://127.0.0.1:5000/api/communities?page=1&size=4&sort=newest",  # noqa
+                "self": "https://127.0.0.1:5000/api/communities?page=2&size=4&sort=newest",  # noqa
             }
             for a in expected_json["aggregations"]:
                 for b in expected_json["aggregations"][a]["buckets"]:
@@ -277,7 +279,7 @@ def test_group_collections_resource_search(
                 for b in expected_json["aggregations"][a]["buckets"]:
                     b["doc_count"] = 1
             expected_json["links"] = {
-                "self": "https://127.0.0.1:5000/api/communities?page=1&q=%2B_exists_%3Acustom_fields.kcr%5C%3Acommons_instance%20%2Bcustom_fields.kcr%5C%3Acommons_instance%3AknowledgeCommons%20%2Bcustom_fields.kcr%5C%3Acommons_group_id%3A456&size=25&sort=newest"  # noqa
+                "self": "https://127.0.0.1:5000/api/communities?commons_group_id=456&commons_instance=knowledgeCommons&page=1&size=25&sort=newest"  # noqa
             }
         if idx == 1:
             expected_json["hits"]["total"] = 4
@@ -291,11 +293,11 @@ def test_group_collections_resource_search(
                 for b in expected_json["aggregations"][a]["buckets"]:
                     b["doc_count"] = 4
             expected_json["links"] = {
-                "self": "https://127.0.0.1:5000/api/communities?page=1&q=%2B_exists_%3Acustom_fields.kcr%5C%3Acommons_instance%20%2Bcustom_fields.kcr%5C%3Acommons_instance%3AknowledgeCommons%20&size=25&sort=newest"  # noqa
+                "self": "https://127.0.0.1:5000/api/communities?commons_instance=knowledgeCommons&page=1&size=25&sort=newest"  # noqa
             }
         if idx == 0:
             expected_json["links"] = {
-                "self": "https://127.0.0.1:5000/api/communities?page=1&q=%2B_exists_%3Acustom_fields.kcr%5C%3Acommons_instance%20&size=25&sort=newest"  # noqa
+                "self": "https://127.0.0.1:5000/api/communities?page=1&size=25&sort=newest"  # noqa
             }
 
         print("actual hits", [h["slug"] for h in actual.json["hits"]["hits"]])
@@ -331,6 +333,222 @@ def test_group_collections_resource_search(
         assert actual.json == expected_json
 
 
+def test_group_collections_resource_search_cursor(
+    app,
+    client,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+):
+    """Test walking all collections with search_after cursors."""
+    sample_communities(app, communities_service)
+
+    slugs = []
+    url = "/group_collections?size=4&sort=updated-asc&cursor="
+    next_cursor = ""
+    while next_cursor is not None:
+        actual = client.get(f"{url}{next_cursor}", follow_redirects=True)
+        assert actual.status_code == 200
+        assert actual.json["hits"]["total"] == 8
+        slugs.extend(h["slug"] for h in actual.json["hits"]["hits"])
+        next_cursor = actual.json["next"]
+
+    assert len(slugs) == 8
+    assert len(set(slugs)) == 8
+
+    actual = client.get(f"{url}not-a-cursor", follow_redirects=True)
+    assert actual.status_code == 400
+
+
+def test_group_collections_resource_export(
+    app,
+    client,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+):
+    """Test streaming collections as newline-delimited JSON."""
+    sample_communities(app, communities_service)
+
+    actual = client.get("/group_collections/_export", follow_redirects=True)
+    assert actual.status_code == 200
+    assert actual.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in actual.data.splitlines()]
+    assert len(lines) == 8
+    assert len({line["slug"] for line in lines}) == 8
+
+    actual = client.get(
+        "/group_collections/_export?commons_instance=msuCommons",
+        follow_redirects=True,
+    )
+    lines = [json.loads(line) for line in actual.data.splitlines()]
+    assert len(lines) == 4
+    assert all(
+        line["custom_fields"]["kcr:commons_instance"] == "msuCommons"
+        for line in lines
+    )
+
+
+def test_group_collections_resource_fields(
+    app,
+    client,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+):
+    """Test requesting only some fields of collections."""
+    sample_communities(app, communities_service)
+
+    actual = client.get(
+        "/group_collections?commons_instance=knowledgeCommons"
+        "&fields=slug,custom_fields.kcr:commons_group_id",
+        follow_redirects=True,
+    )
+    assert actual.status_code == 200
+    assert actual.json["hits"]["total"] == 4
+    for h in actual.json["hits"]["hits"]:
+        assert set(h.keys()) == {"id", "slug", "custom_fields"}
+        assert list(h["custom_fields"].keys()) == ["kcr:commons_group_id"]
+
+    actual = client.get(
+        "/group_collections/community-1?fields=slug,metadata.title",
+        follow_redirects=True,
+    )
+    assert actual.status_code == 200
+    assert actual.json["slug"] == "community-1"
+    assert actual.json["metadata"] == {"title": "Community 1"}
+    assert set(actual.json.keys()) == {"id", "slug", "metadata"}
+
+    actual = client.get(
+        "/group_collections?fields=slug,bucket_id", follow_redirects=True
+    )
+    assert actual.status_code == 400
+
+
+def test_group_collections_resource_batch_read(
+    app,
+    client,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+):
+    """Test reading several collections by slug in one request."""
+    sample_communities(app, communities_service)
+    headers = {
+        "content-type": "application/json",
+        "accept": "application/json",
+    }
+
+    actual = client.post(
+        "/group_collections/_batch_read",
+        data=json.dumps(
+            {"slugs": ["community-1", "msu-community-2", "collection-nonexistent"]}
+        ),
+        follow_redirects=True,
+        headers=headers,
+    )
+    assert actual.status_code == 200
+    collections = actual.json["collections"]
+    assert set(collections.keys()) == {
+        "community-1",
+        "msu-community-2",
+        "collection-nonexistent",
+    }
+    assert collections["community-1"]["slug"] == "community-1"
+    assert collections["msu-community-2"]["metadata"]["title"] == "MSU Community 2"
+    assert collections["collection-nonexistent"] == {
+        "message": "No collection found with the slug collection-nonexistent",
+        "status": 404,
+    }
+
+    actual = client.post(
+        "/group_collections/_batch_read",
+        data=json.dumps({"slugs": "community-1"}),
+        follow_redirects=True,
+        headers=headers,
+    )
+    assert actual.status_code == 400
+
+
+def test_group_collections_resource_etag(
+    app,
+    client,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+):
+    """Test that GET responses carry an ETag and honour If-None-Match."""
+    sample_communities(app, communities_service)
+
+    for url in [
+        "/group_collections/community-1",
+        "/group_collections/community-1?fields=slug",
+        "/group_collections?commons_instance=knowledgeCommons",
+        "/group_collections?commons_instance=knowledgeCommons&fields=slug",
+        "/group_collections?commons_instance=knowledgeCommons&cursor=",
+    ]:
+        actual = client.get(url, follow_redirects=True)
+        assert actual.status_code == 200
+        etag = actual.headers["ETag"]
+        assert etag
+
+        actual = client.get(
+            url, follow_redirects=True, headers={"If-None-Match": etag}
+        )
+        assert actual.status_code == 304
+        assert actual.headers["ETag"] == etag
+        assert not actual.data
+
+        actual = client.get(
+            url, follow_redirects=True, headers={"If-None-Match": '"other"'}
+        )
+        assert actual.status_code == 200
+
+
+def test_group_collections_resource_etag_skips_body(
+    app,
+    client,
+    sample_communities,
+    community_type_v,
+    location,
+    communities_service,
+    monkeypatch,
+):
+    """Test that a matching If-None-Match does not build the response body."""
+    sample_communities(app, communities_service)
+    url = "/group_collections?commons_instance=knowledgeCommons"
+
+    def fail_versions(*args, **kwargs):
+        raise AssertionError("The versions should be taken from the response")
+
+    # without If-None-Match the ETag comes from the hits of the search
+    monkeypatch.setattr(
+        current_group_collections_service, "collection_versions", fail_versions
+    )
+    etag = client.get(url, follow_redirects=True).headers["ETag"]
+    monkeypatch.undo()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The response body should not be built")
+
+    monkeypatch.setattr(current_group_collections_service, "search", fail)
+    actual = client.get(url, follow_redirects=True, headers={"If-None-Match": etag})
+    assert actual.status_code == 304
+    monkeypatch.undo()
+
+    # the ETag depends on the query args
+    actual = client.get(
+        f"{url}&size=5", follow_redirects=True, headers={"If-None-Match": etag}
+    )
+    assert actual.status_code == 200
+    assert actual.headers["ETag"] != etag
+
+
 @pytest.mark.parametrize(
     "url,expected_response_code,expected_json",
     [
@@ -462,6 +680,79 @@ def test_group_collections_resource_create(
             assert actual == expected_json
 
 
+def test_group_collections_resource_create_async(
+    app,
+    appctx,
+    broker_uri,
+    client,
+    db,
+    admin,
+    location,
+    sample_community1,
+    search_clear,
+    requests_mock,
+):
+    """Test creating a collection as a background job."""
+    with app.test_client() as client:
+        update_url = app.config["GROUP_COLLECTIONS_METADATA_ENDPOINTS"][
+            "knowledgeCommons"
+        ]["url"]
+        requests_mock.get(
+            update_url.replace("{id}", "1004290"),
+            status_code=200,
+            json=sample_community1["api_response"],
+        )
+        requests_mock.get(
+            "https://hcommons-dev.org/app/plugins/buddypress/bp-core/images/mystery-group.png",  # noqa
+            status_code=404,
+        )
+        headers = {
+            "Authorization": f"Bearer {admin.allowed_token}",
+            "content-type": "application/json",
+            "accept": "application/json",
+        }
+
+        actual_resp = client.post(
+            "/group_collections?async=true",
+            data=json.dumps(
+                {
+                    "commons_instance": "knowledgeCommons",
+                    "commons_group_id": "1004290",
+                    "collection_visibility": "public",
+                }
+            ),
+            follow_redirects=True,
+            headers=headers,
+        )
+        assert actual_resp.status_code == 202
+        job = actual_resp.json
+        assert job["operation"] == "create"
+        assert actual_resp.headers["Location"] == job["links"]["self"]
+
+        # tasks run eagerly in the tests, so the job is already finished
+        status_resp = client.get(
+            f"/group_collections/_jobs/{job['id']}", headers=headers
+        )
+        assert status_resp.status_code == 200
+        assert status_resp.json["status"] == "succeeded"
+        assert status_resp.json["result"]["collection"] == "the-inklings"
+        assert status_resp.json["error"] is None
+
+        missing_resp = client.get("/group_collections/_jobs/nonexistent")
+        assert missing_resp.status_code == 404
+
+        # a succeeded job is not run again when resumed
+        resume_resp = client.post(
+            f"/group_collections/_jobs/{job['id']}/resume", headers=headers
+        )
+        assert resume_resp.status_code == 202
+        assert resume_resp.json["status"] == "succeeded"
+        assert resume_resp.headers["Location"] == job["links"]["self"]
+
+        missing_resp = client.post("/group_collections/_jobs/nonexistent/resume")
+        assert missing_resp.status_code == 404
+
+
 def test_collections_resource_create_unauthorized(
     app,
     appctx,